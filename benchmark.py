@@ -0,0 +1,536 @@
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import image_watermark_choice as image_wm
+import video_watermark_choice as video_wm
+from PIL import Image
+
+from logo_cache import decode_logo_source, get_logo_cache_stats, load_logo_entry, logo_cache
+from pdf_writer import StreamingPdfWriter
+from saliency_cache import configure_saliency_cache, get_saliency_cache_stats, saliency_cache
+from watermark_compositing import CompositeSprite
+
+def make_synthetic_frame(width, height, seed=0):
+    """Membuat frame sintetis (gradien + noise) agar benchmark tidak bergantung pada file media."""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frame = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    noise = rng.integers(0, 32, size=(height, width, 3), dtype=np.uint8)
+    return cv2.add(frame, noise)
+
+def make_synthetic_logo(size=400):
+    """Membuat logo sintetis: lingkaran berwarna di atas latar belakang putih."""
+    logo = np.full((size, size, 3), 255, dtype=np.uint8)
+    cv2.circle(logo, (size // 2, size // 2), size // 3, (40, 90, 200), -1)
+    cv2.putText(logo, "WM", (size // 4, size // 2 + size // 10), cv2.FONT_HERSHEY_SIMPLEX, size / 150, (255, 255, 255), 4, cv2.LINE_AA)
+    return logo
+
+def measure_fps(process_frame, frames):
+    """Mengukur frame per detik untuk fungsi pemrosesan frame."""
+    start = time.perf_counter()
+    for frame in frames:
+        process_frame(frame.copy())
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed
+
+def bench_video_logo(width=1920, height=1080, n_frames=60):
+    """Membandingkan fps watermark logo video: persiapan logo per frame vs sekali per video."""
+    frames = [make_synthetic_frame(width, height, seed=i) for i in range(n_frames)]
+    logo_path = os.path.join(tempfile.mkdtemp(prefix='wm_bench_'), 'logo.png')
+    cv2.imwrite(logo_path, make_synthetic_logo())
+    position_str, scale_factor, opacity = 'bawah kanan', 0.3, 0.6
+
+    def per_frame(frame):
+        # Perilaku lama: baca, preprocess dan hitung posisi logo di setiap frame
+        logo = video_wm.preprocess_logo_video(cv2.imread(logo_path, cv2.IMREAD_UNCHANGED), scale_factor)
+        position = video_wm.get_watermark_position_video(frame, logo, position_str)
+        return video_wm.add_logo_watermark_video(frame, logo, position, opacity)
+
+    prepared = video_wm.PreparedLogoWatermark(frames[0], load_logo_entry(logo_path)[0], position_str, scale_factor, opacity)
+
+    before = measure_fps(per_frame, frames)
+    after = measure_fps(prepared.apply, frames)
+    print(f"[video-logo] {width}x{height}, {n_frames} frame")
+    print(f"  per frame : {before:8.1f} fps")
+    print(f"  prepared  : {after:8.1f} fps ({after / before:.1f}x)")
+    return {'per_frame_fps': before, 'prepared_fps': after}
+
+def bench_video_text(width=1920, height=1080, n_frames=60, font_type='hershey simplex'):
+    """Membandingkan fps watermark teks video: render teks di seluruh frame vs sprite teks yang dirender sekali."""
+    frames = [make_synthetic_frame(width, height, seed=i) for i in range(n_frames)]
+    text, position_str, font_color, opacity = 'Sample Watermark', 'bawah kanan', (0, 0, 255), 0.6
+
+    def per_frame(frame):
+        # Perilaku lama: ukur, gambar dan blend teks di seluruh frame setiap kali
+        return video_wm.add_text_watermark_video(frame, text, position_str, font_color, font_type, 2, 0.5, opacity)
+
+    prepared = video_wm.PreparedTextWatermark(frames[0], text, position_str, font_color, font_type, 2, 0.5, opacity)
+
+    before = measure_fps(per_frame, frames)
+    after = measure_fps(prepared.apply, frames)
+    print(f"[video-text] {width}x{height}, {n_frames} frame, font '{font_type}'")
+    print(f"  per frame : {before:8.1f} fps")
+    print(f"  sprite    : {after:8.1f} fps ({after / before:.1f}x)")
+    return {'per_frame_fps': before, 'sprite_fps': after}
+
+def bench_video_enhance(width=1920, height=1080, n_frames=60):
+    """Mengukur fps pemrosesan frame video untuk tiap opsi enhancement (profil dan enhance_every)."""
+    frames = [make_synthetic_frame(width, height, seed=i) for i in range(n_frames)]
+    variants = {  # enhance_every None = default profil
+        'quality': ('quality', None),
+        'balanced': ('balanced', None),
+        'fast': ('fast', None),
+        'quality/2': ('quality', 2),
+        'fast/4': ('fast', 4),
+        'off': ('off', None),
+    }
+
+    results = {}
+    for label, (profile, every) in variants.items():
+        start = time.perf_counter()
+        for index, frame in enumerate(frames):
+            video_wm.process_video_frame(frame.copy(), enhance_quality=profile, frame_index=index, enhance_every=every)
+        results[label] = n_frames / (time.perf_counter() - start)
+
+    print_fps_table(f"[video-enhance] {width}x{height}, {n_frames} frame (profil/enhance_every)", results)
+    return results
+
+def make_synthetic_clip(width, height, n_frames, scene_length=60):
+    """Membuat frame klip sintetis: adegan baru setiap scene_length frame, dengan objek yang bergerak pelan dan noise per frame."""
+    frames = []
+    for index in range(n_frames):
+        scene = make_synthetic_scene(width, height, seed=index // scene_length)
+        offset = (index % scene_length) * max(1, width // 400)
+        cv2.circle(scene, (width // 4 + offset, height // 2), min(width, height) // 10, (0, 255, 255), -1)
+        noise = np.random.default_rng(index).integers(0, 8, size=scene.shape, dtype=np.uint8)
+        frames.append(cv2.add(scene, noise))
+    return frames
+
+def bench_video_auto(width=1280, height=720, n_frames=120, sample_every=(15, 30)):
+    """Membandingkan posisi 'auto' video: saliency di setiap frame vs AutoPositionTracker (sampel + scene cut + hysteresis).
+
+    Melaporkan fps penentuan posisi dan jumlah perpindahan watermark (jitter) sepanjang klip.
+    """
+    frames = make_synthetic_clip(width, height, n_frames)
+    watermark_size = (height // 6, width // 5)
+
+    def run(update):
+        positions = []
+        start = time.perf_counter()
+        for index, frame in enumerate(frames):
+            positions.append(update(frame, index))
+        fps = n_frames / (time.perf_counter() - start)
+        moves = sum(1 for previous, current in zip(positions, positions[1:]) if previous != current)
+        return fps, moves
+
+    results = {'per-frame': run(lambda frame, index: image_wm.find_optimal_position(frame, watermark_size, 256))}
+    for every in sample_every:
+        tracker = video_wm.AutoPositionTracker(watermark_size, sample_every=every)
+        results[f'tracker/{every}'] = run(tracker.update)
+
+    print(f"[video-auto] {width}x{height}, {n_frames} frame, adegan baru setiap 60 frame")
+    baseline = results['per-frame'][0]
+    for label, (fps, moves) in results.items():
+        print(f"  {label:<11}: {fps:8.1f} fps ({fps / baseline:5.1f}x) | posisi berpindah {moves:3d}x")
+    return {label: {'fps': fps, 'moves': moves} for label, (fps, moves) in results.items()}
+
+def legacy_channel_blend(image, logo, position, opacity):
+    """Implementasi blending lama (loop per channel, alpha float64 dihitung ulang) sebagai pembanding."""
+    h, w = logo.shape[:2]
+    x, y = position
+    for c in range(0, 3):
+        image[y:y+h, x:x+w, c] = (logo[:, :, c] * (logo[:, :, 3] / 255.0 * opacity) +
+                                  image[y:y+h, x:x+w, c] * (1.0 - logo[:, :, 3] / 255.0 * opacity))
+    return image
+
+def bench_composite(repeats=30):
+    """Micro-benchmark kernel compositing: loop per channel lama vs CompositeSprite fixed-point pada berbagai resolusi dan ukuran logo."""
+    resolutions = {'720p': (1280, 720), '1080p': (1920, 1080), '4K': (3840, 2160)}
+    logo_fractions = (0.1, 0.3, 0.5)
+    results = {}
+
+    print(f"[composite] {repeats} pengulangan per kasus")
+    for label, (width, height) in resolutions.items():
+        image = make_synthetic_frame(width, height)
+        for fraction in logo_fractions:
+            size = int(min(width, height) * fraction)
+            logo = video_wm.remove_background_video(cv2.resize(make_synthetic_logo(), (size, size)))
+            position = (width - size, height - size)
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                legacy_channel_blend(image, logo, position, 0.6)
+            legacy_ms = (time.perf_counter() - start) / repeats * 1000
+
+            sprite = CompositeSprite(logo, 0.6)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                sprite.blend_into(image, position)
+            kernel_ms = (time.perf_counter() - start) / repeats * 1000
+
+            results[f"{label}/{size}px"] = {'legacy_ms': legacy_ms, 'kernel_ms': kernel_ms}
+            print(f"  {label:>5} logo {size:>4}px : lama {legacy_ms:7.2f} ms | kernel {kernel_ms:7.2f} ms ({legacy_ms / kernel_ms:.1f}x)")
+    return results
+
+def write_synthetic_video(path, width, height, n_frames, fps=30):
+    """Menulis video sintetis pendek ke path untuk benchmark end-to-end."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(n_frames):
+        writer.write(make_synthetic_frame(width, height, seed=i))
+    writer.release()
+    return path
+
+def run_video_jobs(width, height, n_frames, variants):
+    """Menjalankan add_watermark_to_multiple_videos untuk tiap varian opsi dan mengembalikan fps end-to-end."""
+    work_dir = tempfile.mkdtemp(prefix='wm_bench_')
+    video_path = write_synthetic_video(os.path.join(work_dir, 'input.mp4'), width, height, n_frames)
+    logo_path = os.path.join(work_dir, 'logo.png')
+    cv2.imwrite(logo_path, make_synthetic_logo())
+
+    # Output video ditulis ke direktori kerja, jadi jalankan di folder sementara
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    results = {}
+    try:
+        for label, options in variants.items():
+            start = time.perf_counter()
+            result = video_wm.add_watermark_to_multiple_videos(video_path, 'logo', logo_path=logo_path, position_str='bawah kanan',
+                                                               opacity=0.6, enhance_quality=True, **options)
+            elapsed = time.perf_counter() - start
+            if result[1]:
+                raise RuntimeError(result[1])
+            results[label] = n_frames / elapsed
+    finally:
+        os.chdir(previous_dir)
+    return results
+
+def print_fps_table(title, results):
+    """Mencetak tabel fps relatif terhadap varian pertama."""
+    baseline = next(iter(results.values()))
+    print(title)
+    for label, fps in results.items():
+        print(f"  {label:<12}: {fps:8.1f} fps ({fps / baseline:.2f}x)")
+
+def bench_video_pipeline(width=1920, height=1080, n_frames=90, workers=(2, 4, 8)):
+    """Membandingkan fps end-to-end add_watermark_to_multiple_videos: sekuensial vs pipeline thread."""
+    variants = {'sequential': {}}
+    variants.update({f'pipeline-{count}': {'pipeline_workers': count} for count in workers})
+    results = run_video_jobs(width, height, n_frames, variants)
+    print_fps_table(f"[video-pipeline] {width}x{height}, {n_frames} frame, {os.cpu_count()} CPU", results)
+    return results
+
+def bench_video_segments(width=1920, height=1080, n_frames=240, segments=(2, 4, 8)):
+    """Membandingkan fps end-to-end: sekuensial vs video dibagi per segmen di beberapa proses."""
+    variants = {'sequential': {}}
+    variants.update({f'segments-{count}': {'segments': count} for count in segments})
+    results = run_video_jobs(width, height, n_frames, variants)
+    print_fps_table(f"[video-segments] {width}x{height}, {n_frames} frame, {os.cpu_count()} CPU", results)
+    return results
+
+def bench_pdf_output(page_counts=(10, 25, 50), width=850, height=1100):
+    """Mengukur biaya menulis PDF output per halaman: save ulang per halaman (lama), append Pillow, dan writer streaming.
+
+    Biaya per halaman yang konstan saat jumlah halaman bertambah berarti biaya total linear.
+    """
+    work_dir = tempfile.mkdtemp(prefix='wm_bench_')
+    pdf_path = os.path.join(work_dir, 'output.pdf')
+    results = {}
+
+    print(f"[pdf-output] halaman {width}x{height}, ms per halaman")
+    for count in page_counts:
+        pages = [make_synthetic_frame(width, height, seed=i) for i in range(count)]
+
+        # Perilaku lama: seluruh PDF disimpan ulang setiap kali satu halaman selesai
+        start = time.perf_counter()
+        pil_pages = []
+        for page in pages:
+            pil_pages.append(Image.fromarray(cv2.cvtColor(page, cv2.COLOR_BGR2RGB)))
+            pil_pages[0].save(pdf_path, save_all=True, append_images=pil_pages[1:], resolution=300)
+        resave_ms = (time.perf_counter() - start) / count * 1000
+
+        start = time.perf_counter()
+        for idx, page in enumerate(pages):
+            Image.fromarray(cv2.cvtColor(page, cv2.COLOR_BGR2RGB)).save(pdf_path, append=idx > 0, resolution=300)
+        append_ms = (time.perf_counter() - start) / count * 1000
+
+        start = time.perf_counter()
+        with StreamingPdfWriter(pdf_path) as writer:
+            for page in pages:
+                writer.add_page(page, resolution=300)
+        streaming_ms = (time.perf_counter() - start) / count * 1000
+
+        results[count] = {'resave_ms': resave_ms, 'pillow_append_ms': append_ms, 'streaming_ms': streaming_ms}
+        print(f"  {count:>4} halaman : save ulang {resave_ms:8.2f} | append Pillow {append_ms:8.2f} | streaming {streaming_ms:6.2f}")
+    return results
+
+def bench_pdf_vector(page_count=50, width=2550, height=3300):
+    """Mengukur biaya watermark PDF mode vektor (overlay ke halaman asli) per halaman dan pertambahan ukuran file."""
+    work_dir = tempfile.mkdtemp(prefix='wm_bench_')
+    input_path = os.path.join(work_dir, 'input.pdf')
+    page = make_synthetic_frame(width, height)
+    with StreamingPdfWriter(input_path) as writer:
+        for _ in range(page_count):
+            writer.add_page(page, resolution=300)
+
+    results = {}
+    print(f"[pdf-vector] {page_count} halaman {width}x{height} (300 dpi)")
+    for watermark_type, options in (('logo', {'logo_image': make_synthetic_logo()}), ('text', {'text': 'Sample Watermark', 'font_color': (0, 0, 255)})):
+        output_path = os.path.join(work_dir, f'output_{watermark_type}.pdf')
+        start = time.perf_counter()
+        image_wm.add_watermark_to_pdf_vector(input_path, output_path, watermark_type, 'bawah kanan', 0.6, **options)
+        page_ms = (time.perf_counter() - start) / page_count * 1000
+        growth_kb = (os.path.getsize(output_path) - os.path.getsize(input_path)) / 1024
+
+        results[watermark_type] = {'ms_per_page': page_ms, 'size_growth_kb': growth_kb}
+        print(f"  {watermark_type:<5}: {page_ms:6.2f} ms per halaman | ukuran bertambah {growth_kb:7.1f} KB")
+    return results
+
+def bench_pdf_pages(page_count=16, width=1275, height=1650, workers=(1, 2, 4), enhance_quality=True):
+    """Membandingkan halaman per detik mode raster PDF: halaman berurutan vs render + watermark paralel (pdf_workers).
+
+    Membutuhkan poppler (lihat POPPLER_PATH di image_watermark_choice).
+    """
+    work_dir = tempfile.mkdtemp(prefix='wm_bench_')
+    input_path = os.path.join(work_dir, 'input.pdf')
+    with StreamingPdfWriter(input_path) as writer:
+        for i in range(page_count):
+            writer.add_page(make_synthetic_frame(width, height, seed=i), resolution=300)
+
+    # Output PDF ditulis ke direktori kerja, jadi jalankan di folder sementara
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    results = {}
+    try:
+        for count in workers:
+            start = time.perf_counter()
+            result = image_wm.process_multiple_files(input_path, 'logo', enhance_quality, position_str='bawah kanan', opacity=0.6,
+                                                     output_format='pdf', logo_image=make_synthetic_logo(), pdf_workers=count)
+            elapsed = time.perf_counter() - start
+            if result[1]:
+                raise RuntimeError(result[1])
+            results[f'workers-{count}'] = page_count / elapsed
+    finally:
+        os.chdir(previous_dir)
+
+    baseline = next(iter(results.values()))
+    print(f"[pdf-pages] {page_count} halaman {width}x{height}, enhance {enhance_quality}, {os.cpu_count()} CPU")
+    for label, pages_per_second in results.items():
+        print(f"  {label:<10}: {pages_per_second:6.2f} halaman/detik ({pages_per_second / baseline:.2f}x)")
+    return results
+
+def bench_enhancement(width=2550, height=3300, noise_sigma=12):
+    """Mengukur waktu dan PSNR tiap profil enhancement pada halaman 300 dpi sintetis ber-noise.
+
+    PSNR dihitung terhadap gambar bersih (seberapa banyak noise hilang) dan terhadap hasil profil
+    'quality' (seberapa mirip dengan perilaku lama).
+    """
+    rng = np.random.default_rng(0)
+    clean = cv2.GaussianBlur(make_synthetic_frame(width, height), (0, 0), 3)
+    cv2.putText(clean, "Lorem ipsum dolor", (width // 20, height // 6), cv2.FONT_HERSHEY_SIMPLEX, width / 400, (0, 0, 0), width // 300, cv2.LINE_AA)
+    noisy = np.clip(clean + rng.normal(0, noise_sigma, clean.shape), 0, 255).astype(np.uint8)
+
+    variants = {profile: (profile, 1.0) for profile in image_wm.ENHANCEMENT_PROFILES}
+    variants['balanced-0.5'] = ('balanced', 0.5)  # Denoise pada luma yang diperkecil
+
+    outputs, results = {}, {}
+    for label, (profile, denoise_scale) in variants.items():
+        start = time.perf_counter()
+        outputs[label] = image_wm.preprocess_image(noisy, profile=profile, denoise_scale=denoise_scale)
+        results[label] = {'ms': (time.perf_counter() - start) * 1000, 'psnr_clean': cv2.PSNR(clean, outputs[label])}
+
+    print(f"[enhancement] {width}x{height}, noise sigma {noise_sigma}")
+    for label, result in results.items():
+        result['psnr_quality'] = cv2.PSNR(outputs['quality'], outputs[label])
+        print(f"  {label:<12}: {result['ms']:9.1f} ms | PSNR vs bersih {result['psnr_clean']:6.2f} dB | vs quality {result['psnr_quality']:6.2f} dB")
+    return results
+
+def make_synthetic_scene(width, height, seed=0):
+    """Membuat gambar sintetis dengan objek menonjol (lingkaran, kotak, teks) di atas latar yang relatif datar."""
+    rng = np.random.default_rng(seed)
+    scene = cv2.GaussianBlur(make_synthetic_frame(width, height, seed), (0, 0), 8)
+    unit = min(width, height)
+    for _ in range(6):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.circle(scene, center, int(unit * rng.uniform(0.05, 0.2)), color, -1)
+    cv2.rectangle(scene, (width // 2, height // 3), (width // 2 + unit // 4, height // 3 + unit // 6), (255, 255, 255), -1)
+    cv2.putText(scene, "Sample Scene", (width // 10, height - height // 10), cv2.FONT_HERSHEY_SIMPLEX, unit / 400, (0, 0, 0), max(1, unit // 200), cv2.LINE_AA)
+    return scene
+
+def legacy_find_optimal_position(image, watermark_size):
+    """Implementasi 'auto' lama (saliency resolusi penuh, peta di-resize, minMaxLoc satu piksel) sebagai pembanding."""
+    saliency_map = cv2.GaussianBlur(image_wm.calculate_saliency(image), (5, 5), 0)
+    h, w = watermark_size
+    resized_map = cv2.resize(1.0 - saliency_map, (image.shape[1] - w, image.shape[0] - h))
+    return cv2.minMaxLoc(resized_map)[2]
+
+def bench_saliency(resolutions=((1920, 1080), (3840, 2160)), max_sides=(128, 256, 512, 1024), watermark_fraction=0.2):
+    """Kecepatan vs akurasi posisi 'auto': implementasi lama vs pencarian integral image pada beberapa max_side.
+
+    Akurasi diukur dengan saliency resolusi penuh: total saliency jendela watermark terpilih dibanding rata-rata
+    semua jendela (lebih kecil lebih baik) dan persentil peringkatnya di antara semua jendela (0% = terbaik).
+    """
+    results = {}
+    for width, height in resolutions:
+        image = make_synthetic_scene(width, height)
+        size = int(min(width, height) * watermark_fraction)
+        watermark_size = (size, size * 2)
+
+        # Referensi: total saliency resolusi penuh untuk setiap kandidat jendela
+        full_map = image_wm.calculate_saliency(image)
+        integral = cv2.integral(full_map, sdepth=cv2.CV_64F)
+        h, w = watermark_size
+        window_sums = integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+        average = window_sums.mean()
+
+        variants = {'legacy': lambda: legacy_find_optimal_position(image, watermark_size)}
+        variants.update({f'max_side={side}': (lambda side=side: image_wm.find_optimal_position(image, watermark_size, side)) for side in max_sides})
+        variants['full'] = lambda: image_wm.find_optimal_position(image, watermark_size, None)
+
+        print(f"[saliency] {width}x{height}, watermark {w}x{h}")
+        for label, find_position in variants.items():
+            start = time.perf_counter()
+            x, y = find_position()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            cost = window_sums[min(y, window_sums.shape[0] - 1), min(x, window_sums.shape[1] - 1)]
+            rank = (window_sums < cost).mean() * 100
+
+            results[f"{width}x{height}/{label}"] = {'ms': elapsed_ms, 'saliency_vs_average': cost / average, 'rank_percentile': rank}
+            print(f"  {label:<14}: {elapsed_ms:8.1f} ms | saliency jendela {cost / average:5.2f}x rata-rata | persentil {rank:5.1f}%")
+    return results
+
+def bench_logo_cache(n_images=50, logo_size=2000, image_size=(1080, 1920)):
+    """Biaya menyiapkan logo per gambar dalam satu batch: baca + preprocess setiap kali vs cache logo proses."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logo_path = os.path.join(tmpdir, 'logo.png')
+        cv2.imwrite(logo_path, make_synthetic_logo(logo_size))
+
+        def uncached():
+            logo = decode_logo_source(logo_path)
+            return image_wm.preprocess_logo(logo, image_size)
+
+        def cached():
+            logo, logo_key = image_wm.load_logo_entry(logo_path)
+            return image_wm.preprocess_logo_cached(logo, image_size, logo_key=logo_key)
+
+        logo_cache.clear()
+        results = {}
+        for label, prepare in (('tanpa cache', uncached), ('dengan cache', cached)):
+            start = time.perf_counter()
+            for _ in range(n_images):
+                prepare()
+            results[label] = (time.perf_counter() - start) * 1000 / n_images
+
+    stats = get_logo_cache_stats()
+    print(f"[logo-cache] logo {logo_size}x{logo_size}, {n_images} gambar {image_size[1]}x{image_size[0]}")
+    for label, ms in results.items():
+        print(f"  {label:<13}: {ms:8.2f} ms/gambar")
+    print(f"  cache: {stats['hits']} hit, {stats['misses']} miss, {stats['entries']} entry, {stats['bytes'] / 1e6:.1f} MB")
+    return {'ms_per_image': results, 'cache': stats}
+
+def bench_variants(width=4000, height=3000, enhance_quality='fast', workers=(1, 4)):
+    """Membuat beberapa varian dari satu sumber: process_image_bytes per varian vs fan-out process_image_variants."""
+    ok, encoded = cv2.imencode('.jpg', make_synthetic_scene(width, height), [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+    data = encoded.tobytes()
+    logo = make_synthetic_logo()
+    variants = [
+        {'watermark_type': 'logo', 'logo_image': logo, 'position_str': 'bawah kanan', 'opacity': 0.6, 'output_format': 'png'},
+        {'watermark_type': 'logo', 'logo_image': logo, 'position_str': 'auto', 'opacity': 0.6, 'output_format': 'jpg'},
+        {'watermark_type': 'text', 'text': 'Sample', 'font_type': 'hershey simplex', 'font_color': 'white', 'position_str': 'auto', 'opacity': 0.6, 'output_format': 'jpg'},
+        {'watermark_type': 'text', 'text': 'Preview', 'font_type': 'hershey simplex', 'font_color': 'white', 'position_str': 'auto', 'opacity': 0.6, 'output_format': 'jpg', 'max_side': 800},
+    ]
+
+    def separate():
+        for variant in variants:
+            options = {key: value for key, value in variant.items() if key != 'max_side'}
+            image_wm.process_image_bytes(data, enchance_quality=enhance_quality, **options)
+
+    runs = {'terpisah': separate}
+    runs.update({f'fan-out workers={count}': (lambda count=count: image_wm.process_image_variants(data, variants, enchance_quality=enhance_quality, workers=count)) for count in workers})
+
+    print(f"[variants] {width}x{height}, {len(variants)} varian, enhancement '{enhance_quality}'")
+    results = {}
+    for label, run in runs.items():
+        saliency_cache.clear()  # Setiap cara dimulai tanpa peta saliency dari run sebelumnya
+        start = time.perf_counter()
+        run()
+        results[label] = (time.perf_counter() - start) * 1000
+        print(f"  {label:<18}: {results[label]:8.1f} ms")
+    return results
+
+def bench_saliency_cache(width=4000, height=3000, max_side=512, repeats=5, watermark_fraction=0.2):
+    """Posisi 'auto' berulang pada gambar yang sama: tanpa cache, cache miss, cache memori, dan sidecar .npy (float16/uint8)."""
+    image = make_synthetic_scene(width, height)
+    size = int(min(width, height) * watermark_fraction)
+    watermark_size = (size, size * 2)
+
+    def uncached():
+        saliency_map = image_wm.calculate_saliency(image, max_side)
+        return image_wm.find_optimal_position(image, watermark_size, max_side, saliency_map=saliency_map)
+
+    def cached():
+        return image_wm.find_optimal_position(image, watermark_size, max_side)
+
+    def cache_miss():
+        saliency_cache.clear()  # Gambar baru: hashing gambar kerja + saliency
+        return cached()
+
+    print(f"[saliency-cache] {width}x{height}, max_side {max_side}, {repeats} kali")
+    results = {}
+    saliency_cache.clear()
+    for label, find_position in (('tanpa cache', uncached), ('cache miss', cache_miss), ('cache memori', cached)):
+        find_position()  # Pemanasan; untuk cache memori ini juga mengisi cache
+        start = time.perf_counter()
+        for _ in range(repeats):
+            find_position()
+        results[label] = (time.perf_counter() - start) * 1000 / repeats
+        print(f"  {label:<20}: {results[label]:8.1f} ms/gambar")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for dtype in ('float16', 'uint8'):
+            sidecar_dir = os.path.join(tmpdir, dtype)
+            configure_saliency_cache(sidecar_dir=sidecar_dir, sidecar_dtype=dtype)
+            saliency_cache.clear()
+            cached()  # Menulis sidecar
+            saliency_cache.clear()  # Proses baru: memori kosong, sidecar masih ada
+            start = time.perf_counter()
+            cached()
+            label = f'sidecar {dtype}'
+            results[label] = (time.perf_counter() - start) * 1000
+            sidecar_bytes = sum(os.path.getsize(os.path.join(sidecar_dir, name)) for name in os.listdir(sidecar_dir))
+            print(f"  {label:<20}: {results[label]:8.1f} ms/gambar | {sidecar_bytes / 1e3:.0f} KB di disk")
+        configure_saliency_cache(sidecar_dir=None)
+
+    results['cache'] = get_saliency_cache_stats()
+    return results
+
+BENCHMARKS = {
+    'video-logo': bench_video_logo,
+    'video-text': bench_video_text,
+    'video-enhance': bench_video_enhance,
+    'video-auto': bench_video_auto,
+    'composite': bench_composite,
+    'video-pipeline': bench_video_pipeline,
+    'video-segments': bench_video_segments,
+    'pdf-output': bench_pdf_output,
+    'pdf-vector': bench_pdf_vector,
+    'pdf-pages': bench_pdf_pages,
+    'enhancement': bench_enhancement,
+    'saliency': bench_saliency,
+    'logo-cache': bench_logo_cache,
+    'variants': bench_variants,
+    'saliency-cache': bench_saliency_cache,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark watermark dengan media sintetis.")
+    parser.add_argument('names', nargs='*', default=list(BENCHMARKS), help=f"Benchmark yang dijalankan: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+
+    for name in args.names:
+        BENCHMARKS[name]()
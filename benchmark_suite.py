@@ -0,0 +1,326 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+from benchmark import make_synthetic_logo, make_synthetic_scene, write_synthetic_video
+from job_metrics import JobMetrics
+from main import watermark_image, watermark_image_bytes, watermark_video
+from pdf_writer import StreamingPdfWriter
+from saliency_cache import saliency_cache
+from watermark_handler import run_watermark_handler
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS tidak tersedia
+    resource = None
+
+# Resolusi gambar sintetis (lebar, tinggi)
+RESOLUTIONS = {'720p': (1280, 720), '1080p': (1920, 1080), '4k': (3840, 2160), '8k': (7680, 4320)}
+
+# Posisi yang diuji per jenis watermark ('luar gambar' hanya berlaku untuk teks gambar)
+IMAGE_POSITIONS = {'text': ('bawah kanan', 'auto', 'luar gambar'), 'logo': ('bawah kanan', 'auto')}
+VIDEO_POSITIONS = ('bawah kanan', 'auto')
+
+WATERMARK_OPTIONS = {
+    'text': {'text': 'Sample Watermark', 'font_type': 'hershey simplex', 'font_color': 'white', 'opacity': 0.6},
+    'logo': {'opacity': 0.6},
+}
+
+def peak_rss_bytes():
+    """Puncak resident set size proses ini dalam byte, atau None jika tidak tersedia."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux melaporkan KB, macOS byte
+
+def make_fixtures(fixture_dir, resolutions, pdf_pages=4, video_size=(1280, 720), video_frames=60):
+    """Membuat media sintetis dengan seed tetap di fixture_dir (file yang sudah ada dipakai ulang).
+
+    Mengembalikan dict nama fixture -> {'path', 'units', 'unit'}: gambar per resolusi (JPEG), PDF beberapa
+    halaman ukuran Letter, video pendek, dan logo PNG. units adalah jumlah kerja per job untuk throughput
+    (megapiksel, halaman, atau frame).
+    """
+    fixture_dir = os.path.abspath(fixture_dir)
+    os.makedirs(fixture_dir, exist_ok=True)
+    fixtures = {}
+
+    def fixture(name, units, unit, create):
+        path = os.path.join(fixture_dir, name)
+        if not os.path.exists(path):
+            create(path)
+        return {'path': path, 'units': units, 'unit': unit}
+
+    for label in resolutions:
+        width, height = RESOLUTIONS[label]
+        fixtures[f'image-{label}'] = fixture(
+            f'scene_{label}.jpg', width * height / 1e6, 'MPix',
+            lambda path, width=width, height=height: cv2.imwrite(path, make_synthetic_scene(width, height), [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+        )
+
+    def create_pdf(path):
+        with StreamingPdfWriter(path) as writer:
+            for page in range(pdf_pages):
+                writer.add_page(make_synthetic_scene(1275, 1650, seed=page), resolution=150)  # Letter pada 150 dpi
+    fixtures['pdf'] = fixture(f'document_{pdf_pages}p.pdf', pdf_pages, 'page', create_pdf)
+
+    fixtures['video'] = fixture(
+        f'clip_{video_size[0]}x{video_size[1]}_{video_frames}f.mp4', video_frames, 'frame',
+        lambda path: write_synthetic_video(path, video_size[0], video_size[1], video_frames)
+    )
+    fixtures['logo'] = fixture('logo.png', 0, None, lambda path: cv2.imwrite(path, make_synthetic_logo()))
+    return fixtures
+
+def build_cases(fixtures, enhance_profile=True):
+    """Daftar kasus benchmark: setiap jalur publik x jenis watermark x posisi x enhancement x format output."""
+    cases = []
+    enhance_modes = {'plain': None, 'enhance': enhance_profile}
+
+    def add_case(api, fixture_name, watermark_type, position, enhance, output_format, **extra):
+        options = dict(WATERMARK_OPTIONS[watermark_type], position_str=position, output_format=output_format,
+                       enchance_quality=enhance_modes[enhance], **extra)
+        if watermark_type == 'logo':
+            options['logo_path'] = fixtures['logo']['path']
+        if 'batch_images' in extra:
+            mode = f"/mixed-{extra['workers']}w"
+        else:
+            mode = f"/{extra['pdf_mode']}" if 'pdf_mode' in extra else (f"/{extra['batch_files']}-file" if 'batch_files' in extra else '')
+        cases.append({
+            'name': f"{api}/{fixture_name}/{watermark_type}/{position}/{enhance}/{output_format}{mode}",
+            'api': api, 'fixture': fixture_name, 'path': fixtures[fixture_name]['path'],
+            'units': fixtures[fixture_name]['units'], 'unit': fixtures[fixture_name]['unit'],
+            'watermark_type': watermark_type, 'position': position, 'enhance': enhance, 'output_format': output_format,
+            'options': options,
+        })
+
+    images = [name for name in fixtures if name.startswith('image-')]
+    for fixture_name in images:
+        for watermark_type, positions in IMAGE_POSITIONS.items():
+            for position in positions:
+                for enhance in enhance_modes:
+                    for output_format in ('png', 'jpg'):
+                        add_case('watermark_image', fixture_name, watermark_type, position, enhance, output_format)
+        # Jalur di memori: cukup posisi tetap, bagian lain sama dengan watermark_image
+        for watermark_type in IMAGE_POSITIONS:
+            add_case('watermark_image_bytes', fixture_name, watermark_type, 'bawah kanan', 'plain', 'png')
+        # Batch di proses utama (satu file, dan beberapa file dengan workers=1) dengan metrics aktif
+        for batch_files in (1, 2):
+            add_case('batch', fixture_name, 'text', 'bawah kanan', 'plain', 'png', batch_files=batch_files, workers=1)
+
+    for watermark_type, positions in IMAGE_POSITIONS.items():
+        for position in positions:
+            for enhance in enhance_modes:
+                for output_format in ('pdf', 'png'):
+                    add_case('watermark_image', 'pdf', watermark_type, position, enhance, output_format)
+        add_case('watermark_image', 'pdf', watermark_type, 'bawah kanan', 'plain', 'pdf', pdf_mode='vector')
+
+    for watermark_type in ('text', 'logo'):
+        for position in VIDEO_POSITIONS:
+            for enhance in enhance_modes:
+                for output_format in ('mp4', 'avi'):
+                    add_case('watermark_video', 'video', watermark_type, position, enhance, output_format)
+    # Batch campuran video + gambar dengan opsi khusus video (hanya diteruskan ke file video), tanpa dan dengan pool
+    if images:
+        for workers in (1, 2):
+            add_case('batch', 'video', 'text', 'bawah kanan', 'plain', 'mp4', batch_files=1, batch_images=[fixtures[images[0]]['path']],
+                     workers=workers, pipeline_workers=2, segments=2, segment_workers=2, enhance_every=2)
+    return cases
+
+def run_job(case):
+    """Menjalankan satu job melalui fungsi publik kasus; mengembalikan [output, error_message]."""
+    if case['api'] == 'watermark_image_bytes':
+        with open(case['path'], 'rb') as source_file:
+            data = source_file.read()
+        return watermark_image_bytes(data, **case['options'])
+    if case['api'] == 'watermark_video':
+        return watermark_video(case['path'], **case['options'])
+    if case['api'] == 'batch':
+        options = dict(case['options'])
+        metrics = JobMetrics()
+        file_paths = [case['path']] * options.pop('batch_files') + options.pop('batch_images', [])
+        progress = []
+        if len(file_paths) > 1 and 'segments' in options:
+            # Batch campuran: format output per jenis media; progres video hanya tersedia tanpa process pool
+            options['output_format'] = {'image': 'png', 'video': options['output_format']}
+            if options['workers'] == 1:
+                options['progress_callback'] = progress.append
+        results = run_watermark_handler(file_paths, case['watermark_type'], metrics=metrics, **options)
+        errors = [error for _, error in results if error]
+        if not errors and not metrics.records:
+            errors.append("Batch tidak menghasilkan record metrics")
+        if not errors and 'progress_callback' in options and not progress:
+            errors.append("Opsi video tidak diteruskan ke file video di batch campuran")
+        return [output for output, _ in results], errors[0] if errors else ''
+    return watermark_image(case['path'], **case['options'])
+
+def output_size(output):
+    """Ukuran output dalam byte: file hasil, bytes di memori, atau total list output per halaman."""
+    if isinstance(output, (bytes, bytearray)):
+        return len(output)
+    if isinstance(output, list):
+        return sum(output_size(item) for item in output)
+    if isinstance(output, str) and os.path.isfile(output):
+        return os.path.getsize(output)
+    return None
+
+def run_case(case, repeats, warmup, work_dir):
+    """Menjalankan kasus warmup + repeats kali di proses ini (proses baru per kasus) dan mengukur latency."""
+    os.chdir(work_dir)  # Output ditulis ke direktori kerja
+    baseline_rss = peak_rss_bytes()
+    latencies, error, output = [], '', None
+
+    for run in range(warmup + repeats):
+        # Peta saliency tidak dipakai ulang antar ulangan: pada batch nyata setiap gambar berbeda
+        saliency_cache.clear()
+        start = time.perf_counter()
+        try:
+            output, error = run_job(case)
+        except Exception as e:
+            output, error = None, f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        if error:
+            break
+        if run >= warmup:
+            latencies.append(elapsed)
+
+    return {'latencies': latencies, 'error': error, 'output_bytes': None if error else output_size(output),
+            'baseline_rss_bytes': baseline_rss, 'peak_rss_bytes': peak_rss_bytes()}
+
+def summarize_latencies(latencies, units):
+    """Statistik latency (ms) dan throughput (unit per detik pada median)."""
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    p50 = float(np.percentile(values, 50))
+    return {
+        'runs': len(values),
+        'mean_ms': float(values.mean()), 'stdev_ms': float(values.std()),
+        'min_ms': float(values.min()), 'p50_ms': p50, 'p90_ms': float(np.percentile(values, 90)),
+        'p95_ms': float(np.percentile(values, 95)), 'p99_ms': float(np.percentile(values, 99)), 'max_ms': float(values.max()),
+        'throughput': units / (p50 / 1000) if units else None,
+    }
+
+def describe_environment():
+    """Informasi mesin dan versi untuk membandingkan hasil antar commit."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__, 'numpy': np.__version__,
+    }
+
+def run_suite(cases, repeats=5, warmup=1, progress=print):
+    """Menjalankan setiap kasus di proses baru (spawn) agar cache dingin dan peak RSS per kasus terpisah."""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory(prefix='wm_suite_') as work_dir:
+        for index, case in enumerate(cases, 1):
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    measured = executor.submit(run_case, case, repeats, warmup, work_dir).result()
+            except BrokenProcessPool:
+                measured = {'latencies': [], 'error': 'Proses benchmark berhenti (kemungkinan kehabisan memori)'}
+
+            result = {name: value for name, value in case.items() if name not in ('path', 'options', 'units')}
+            result.update(summarize_latencies(measured['latencies'], case['units']))
+            result.update({name: value for name, value in measured.items() if name != 'latencies'})
+            results.append(result)
+
+            if result['error']:
+                progress(f"[{index}/{len(cases)}] {case['name']}: ERROR {result['error']}")
+            else:
+                progress(f"[{index}/{len(cases)}] {case['name']}: p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms"
+                         f" | {result['throughput']:.2f} {case['unit']}/s | peak RSS {(result['peak_rss_bytes'] or 0) / 1e6:.0f} MB")
+    return results
+
+def compare_results(baseline_path, results, threshold=0.10):
+    """Membandingkan p50 dengan hasil JSON sebelumnya; mengembalikan nama kasus yang lebih lambat dari threshold."""
+    with open(baseline_path) as baseline_file:
+        baseline = {case['name']: case for case in json.load(baseline_file)['cases']}
+
+    regressions = []
+    print(f"Perbandingan p50 dengan {baseline_path} (regresi jika lebih lambat > {threshold:.0%})")
+    for result in results:
+        before = baseline.get(result['name'], {}).get('p50_ms')
+        after = result.get('p50_ms')
+        if before is None or after is None:
+            continue
+        ratio = after / before
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(result['name'])
+            flag = '  <-- regresi'
+        print(f"  {result['name']:<70} {before:9.1f} -> {after:9.1f} ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite benchmark end-to-end watermark_image/watermark_video dengan media sintetis.")
+    parser.add_argument('--output', default='benchmark_results.json', help="File JSON hasil")
+    parser.add_argument('--resolutions', default=None, help=f"Resolusi gambar, dipisah koma: {', '.join(RESOLUTIONS)} (default semua)")
+    parser.add_argument('--repeats', type=int, default=None, help="Jumlah pengukuran per kasus (default 5)")
+    parser.add_argument('--warmup', type=int, default=1, help="Jumlah run pemanasan per kasus (tidak diukur)")
+    parser.add_argument('--enhance-profile', default=None, help="Profil enhancement untuk kasus 'enhance' (fast, balanced, quality); default quality, fast untuk --quick")
+    parser.add_argument('--pdf-pages', type=int, default=None, help="Jumlah halaman PDF sintetis (default 4)")
+    parser.add_argument('--video-frames', type=int, default=None, help="Jumlah frame video sintetis 720p (default 60)")
+    parser.add_argument('--fixtures', default=None, help="Folder fixture (dibuat jika belum ada dan dipakai ulang); default folder sementara")
+    parser.add_argument('--filter', default=None, help="Hanya kasus yang namanya mengandung teks ini")
+    parser.add_argument('--quick', action='store_true', help="Run singkat: 720p dan 1080p, 3 ulangan, PDF 2 halaman, video 30 frame, enhancement fast (opsi yang diberikan tetap dipakai)")
+    parser.add_argument('--list', action='store_true', help="Tampilkan daftar kasus tanpa menjalankannya")
+    parser.add_argument('--compare', default=None, help="JSON hasil sebelumnya untuk dibandingkan (exit code 1 jika ada regresi)")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Batas regresi p50 untuk --compare (0.10 = 10%% lebih lambat)")
+    args = parser.parse_args(argv)
+
+    # Default biasa atau default --quick, hanya untuk opsi yang tidak diberikan
+    defaults = {'resolutions': ','.join(RESOLUTIONS), 'repeats': 5, 'pdf_pages': 4, 'video_frames': 60, 'enhance_profile': 'quality'}
+    if args.quick:
+        defaults.update(resolutions='720p,1080p', repeats=3, pdf_pages=2, video_frames=30, enhance_profile='fast')
+    for name, value in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    resolutions = [label.strip().lower() for label in args.resolutions.split(',') if label.strip()]
+    unknown = [label for label in resolutions if label not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"Resolusi tidak dikenal: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix='wm_fixtures_') as temp_dir:
+        fixtures = make_fixtures(args.fixtures or temp_dir, resolutions, args.pdf_pages, video_frames=args.video_frames)
+        cases = build_cases(fixtures, args.enhance_profile)
+        if args.filter:
+            cases = [case for case in cases if args.filter in case['name']]
+        if args.list:
+            for case in cases:
+                print(case['name'])
+            return 0
+
+        results = run_suite(cases, args.repeats, args.warmup)
+
+    report = {
+        'environment': describe_environment(),
+        'settings': {'resolutions': resolutions, 'repeats': args.repeats, 'warmup': args.warmup, 'enhance_profile': args.enhance_profile,
+                     'pdf_pages': args.pdf_pages, 'video_frames': args.video_frames, 'filter': args.filter},
+        'cases': results,
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Hasil disimpan ke {os.path.abspath(args.output)}")
+
+    if args.compare:
+        return 1 if compare_results(args.compare, results, args.threshold) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from logo_cache import LogoCache
+
+# Folder font bawaan: folder Font di samping modul ini (tidak tergantung direktori kerja).
+# Folder tambahan bisa diberikan lewat environment variable WATERMARK_FONT_DIRS (dipisah os.pathsep).
+DEFAULT_FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Font')
+
+def get_default_font_dirs():
+    """Folder font default: WATERMARK_FONT_DIRS, folder Font bawaan, lalu folder Font di direktori kerja (kompatibilitas)."""
+    env_dirs = [path for path in os.environ.get('WATERMARK_FONT_DIRS', '').split(os.pathsep) if path]
+    return env_dirs + [DEFAULT_FONT_DIR, os.path.abspath('Font')]
+
+class FontRegistry:
+    """Registry font TTF: nama font di-resolve sekali ke file, font dimuat sekali per (font, ukuran),
+    dan bitmap teks yang sudah dirender di-cache per (teks, font, ukuran, warna).
+
+    Cache font dibatasi jumlah entry, cache bitmap teks dibatasi total byte; keduanya membuang entry
+    yang paling lama tidak dipakai (LRU). Aman dipakai dari beberapa thread sekaligus.
+    """
+
+    def __init__(self, font_dirs=None, max_fonts=64, max_text_bytes=32 * 1024 * 1024):
+        self.font_dirs = [os.path.abspath(path) for path in (font_dirs or get_default_font_dirs())]
+        self.max_fonts = max_fonts
+        self.paths = {}  # nama font -> path file .ttf
+        self.fonts = OrderedDict()  # (path, ukuran) -> FreeTypeFont
+        self.text_cache = LogoCache(max_text_bytes)  # (teks, path, ukuran, warna) -> (sprite BGRA, bbox)
+        self.lock = threading.Lock()
+
+    def set_font_dirs(self, font_dirs):
+        """Mengganti daftar folder font (urut prioritas) dan mengosongkan semua cache."""
+        with self.lock:
+            self.font_dirs = [os.path.abspath(path) for path in font_dirs]
+            self.paths.clear()
+            self.fonts.clear()
+        self.text_cache.clear()
+
+    def resolve(self, font_type):
+        """Mengembalikan path file font untuk nama font (atau path .ttf/.otf langsung); ValueError jika tidak ada."""
+        with self.lock:
+            path = self.paths.get(font_type)
+        if path is not None:
+            return path
+
+        if font_type.lower().endswith(('.ttf', '.otf')) and os.path.isfile(font_type):
+            path = os.path.abspath(font_type)
+        else:
+            candidates = (os.path.join(folder, f"{font_type}.ttf") for folder in self.font_dirs)
+            path = next((candidate for candidate in candidates if os.path.isfile(candidate)), None)
+        if path is None:
+            raise ValueError(f"Font TTF '{font_type}' tidak ditemukan di folder {self.font_dirs}. Pastikan file .ttf ada di folder tersebut.")
+
+        with self.lock:
+            self.paths[font_type] = path
+        return path
+
+    def add_path(self, font_type, path):
+        """Mencatat path font yang sudah di-resolve (misalnya oleh proses utama batch) agar folder font tidak dicari lagi."""
+        with self.lock:
+            self.paths[font_type] = path
+
+    def get_font(self, font_type, size):
+        """Mengembalikan FreeTypeFont untuk (font, ukuran), dimuat dari disk hanya sekali."""
+        key = (self.resolve(font_type), int(size))
+        with self.lock:
+            font = self.fonts.get(key)
+            if font is not None:
+                self.fonts.move_to_end(key)
+                return font
+
+        font = ImageFont.truetype(key[0], key[1])
+        with self.lock:
+            self.fonts[key] = font
+            while len(self.fonts) > self.max_fonts:
+                self.fonts.popitem(last=False)
+        return font
+
+    def render_text(self, text, font_type, size, font_color):
+        """Merender teks TTF ke sprite BGRA (warna seragam, alpha dari glyph) yang di-cache.
+
+        Mengembalikan (sprite, bbox): teks digambar di titik (0, 0) sprite seperti ImageDraw.text, dan bbox
+        adalah font.getbbox(text). Sprite hasil cache bersifat read-only.
+        """
+        key = (text, self.resolve(font_type), int(size), tuple(int(channel) for channel in font_color))
+
+        def render():
+            # Font hanya dimuat jika bitmap belum ada di cache
+            font = self.get_font(font_type, size)
+            text_bbox = font.getbbox(text)
+            mask_image = Image.new('L', (max(text_bbox[2], 1), max(text_bbox[3], 1)), 0)
+            ImageDraw.Draw(mask_image).text((0, 0), text, font=font, fill=255)
+            mask = np.array(mask_image)
+
+            sprite = np.empty(mask.shape + (4,), dtype=np.uint8)
+            sprite[:, :, :3] = key[3]
+            sprite[:, :, 3] = mask
+            return sprite, tuple(text_bbox)
+
+        return self.text_cache.get_or_create(key, render)
+
+    def stats(self):
+        """Statistik registry: jumlah font termuat dan statistik cache bitmap teks."""
+        with self.lock:
+            font_count = len(self.fonts)
+        return {'fonts': font_count, 'text': self.text_cache.stats()}
+
+# Registry bersama untuk seluruh proses (setiap proses worker memiliki registry sendiri)
+font_registry = FontRegistry()
+
+def set_font_dirs(font_dirs):
+    """Mengatur folder font (urut prioritas) untuk registry proses ini."""
+    font_registry.set_font_dirs(font_dirs)
+
+def get_font(font_type, size):
+    """FreeTypeFont ter-cache untuk (font, ukuran) dari registry proses ini."""
+    return font_registry.get_font(font_type, size)
+
+def render_ttf_text(text, font_type, size, font_color):
+    """Sprite BGRA teks TTF ter-cache beserta bbox-nya (lihat FontRegistry.render_text)."""
+    return font_registry.render_text(text, font_type, size, font_color)
+
+def build_text_sprite(text, font, size, font_color, thickness=2):
+    """Merender teks watermark sekali menjadi sprite BGRA (warna seragam, alpha dari glyph) untuk gambar dan video.
+
+    font berupa konstanta font OpenCV (Hershey; size = fontScale, thickness None = 1 seperti default OpenCV) atau
+    nama/path font TTF (size = ukuran piksel, dirender lewat registry font). Mengembalikan (sprite, anchor, text_size):
+    anchor adalah letak titik posisi teks di dalam sprite (baseline kiri untuk Hershey, kiri atas untuk TTF) sehingga
+    sprite ditempel di posisi - anchor, dan text_size (lebar, tinggi) dipakai untuk menghitung posisi teks.
+    """
+    if isinstance(font, str):
+        sprite, text_bbox = render_ttf_text(text, font, size, font_color)
+        return sprite, (0, 0), (text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1])
+
+    if thickness is None:
+        thickness = 1
+    (text_w, text_h), baseline = cv2.getTextSize(text, font, size, thickness)
+
+    # Origin putText adalah kiri bawah (baseline) teks, beri padding untuk ketebalan garis
+    pad = thickness + 1
+    mask = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad), dtype=np.uint8)
+    anchor = (pad, pad + text_h)
+    cv2.putText(mask, text, anchor, font, size, 255, thickness, cv2.LINE_AA)
+
+    sprite = np.empty(mask.shape + (4,), dtype=np.uint8)
+    sprite[:, :, :3] = font_color
+    sprite[:, :, 3] = mask
+    return sprite, anchor, (text_w, text_h)
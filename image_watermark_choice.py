@@ -1,8 +1,20 @@
 import cv2
+import io
 import numpy as np
 import os
-from PIL import Image, ImageDraw, ImageFont
-from pdf2image import convert_from_path
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pdf2image import convert_from_path, pdfinfo_from_path
+from font_registry import build_text_sprite, render_ttf_text
+from job_metrics import measure_iter, measure_stage, measured
+from logo_cache import load_logo_entry, logo_cache, logo_content_key
+from pdf_writer import StreamingPdfWriter, build_sprite_overlay_pdf
+from saliency_cache import saliency_cache
+from pypdf import PdfReader, PdfWriter, Transformation
+from watermark_compositing import composite_sprite
+
+POPPLER_PATH = r"C:\\Users\\user\\poppler\\poppler-24.07.0\\Library\\bin"  # Lokasi binary poppler untuk pdf2image
 
 def get_color_from_string(color_str):
     """Mengambil warna RGB dari input string hex (#RRGGBB) atau nama warna ('red', 'green', 'blue')."""
@@ -19,6 +31,10 @@ def get_color_from_string(color_str):
         'magenta': (255, 0, 255)
     }
     
+    # Warna yang sudah berupa tuple BGR (misalnya sudah disiapkan sebelumnya) dipakai langsung
+    if isinstance(color_str, tuple):
+        return color_str
+
     # Ubah input menjadi huruf kecil untuk mencocokkan nama warna
     color_str = color_str.lower().strip()
 
@@ -66,7 +82,6 @@ def add_text_watermark(image, text, position_str, font_type='hershey simplex', f
     """Menambahkan watermark teks ke gambar dengan skala otomatis pada posisi yang ditentukan."""
     image_h, image_w, _ = image.shape
 
-    font_folder = "Font"  # Nama folder untuk font eksternal
     external_font_used = False  # Flag untuk menentukan apakah font eksternal digunakan
 
     # # Ubah warna font dari string ke format BGR
@@ -79,28 +94,33 @@ def add_text_watermark(image, text, position_str, font_type='hershey simplex', f
         text_size, baseline = cv2.getTextSize(text, font, font_scale, thickness) # Fungsi cv2.getTextSize digunakan untuk menghitung ukuran teks (text_size) dan baseline teks (baseline) berdasarkan font, skala font (font_scale), dan ketebalan (thickness). text_size akan berisi lebar dan tinggi teks dalam piksel.
         text_w, text_h = text_size
     else:
-        # Gunakan font eksternal dari folder Font jika tidak ada di OpenCV
+        # Gunakan font eksternal (TTF) dari registry font jika tidak ada di OpenCV
         external_font_used = True
-        font_path = os.path.join(font_folder, f"{font_type}.ttf")
-        
-        # Cek apakah file font eksternal ada
-        if not os.path.exists(font_path):
-            raise ValueError(f"Font '{font_type}' tidak ditemukan di folder '{font_folder}'. Pastikan file .ttf ada di folder tersebut.")
-        
-        # Menggunakan font eksternal
         font_scale = int(scale_factor * min(image_w, image_h) / 10)  # Sesuaikan ukuran font
-        font = ImageFont.truetype(font_path, font_scale) # BMembuat objek font menggunakan font eksternal yang berada di jalur font_path dengan ukuran yang ditentukan oleh font_scale. Fungsi ImageFont.truetype dari modul PIL digunakan untuk mendukung font TTF (TrueType Font) eksternal.
-        
-        # Konversi gambar ke format Pillow untuk mendukung font eksternal
-        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)) # Mengonversi gambar OpenCV (image) menjadi format PIL. OpenCV menggunakan format warna BGR secara default, sehingga cv2.cvtColor digunakan untuk mengubah gambar ke format RGB sebelum konversi ke format PIL menggunakan Image.fromarray.
-        draw = ImageDraw.Draw(pil_image) # Baris ini membuat objek draw dari ImageDraw, yang memungkinkan Anda menggambar di atas pil_image. Dengan draw, Anda dapat menambahkan teks, bentuk, dan elemen lain ke dalam gambar.
-        
-        # Menggunakan textbbox untuk mendapatkan ukuran teks
-        text_bbox = draw.textbbox((0, 0), text, font=font) # draw.textbbox untuk menghitung kotak pembatas (bounding box) dari teks yang akan ditampilkan. text_bbox mengembalikan tuple yang berisi koordinat bounding box (kiri, atas, kanan, bawah) berdasarkan font yang diberikan. Koordinat ini memungkinkan kita mengetahui ukuran teks yang akan digambar.
+        # Teks dirender sekali ke sprite BGRA kecil (di-cache oleh registry font), bukan menggambar di seluruh gambar lewat PIL
+        text_sprite, text_bbox = render_ttf_text(text, font_type, font_scale, font_color) # text_bbox berisi koordinat bounding box teks (kiri, atas, kanan, bawah) relatif terhadap titik gambar teks, sama seperti draw.textbbox.
         text_w = text_bbox[2] - text_bbox[0] # Baris ini menghitung lebar teks (text_w) dengan mengurangkan nilai kiri (text_bbox[0]) dari kanan (text_bbox[2]). Ini memberikan lebar aktual teks dalam piksel.
         text_h = text_bbox[3] - text_bbox[1] # Baris ini menghitung tinggi teks (text_h) dengan mengurangkan nilai atas (text_bbox[1]) dari bawah (text_bbox[3]). Ini memberikan tinggi aktual teks dalam piksel.
         
-    # Menentukan posisi watermark
+    # Menentukan posisi watermark (dibatasi agar teks tidak keluar dari batas gambar)
+    position = get_text_position((image_h, image_w), (text_w, text_h), position_str)
+
+    if external_font_used:
+        # Sprite teks ditempel dengan opacity hanya pada area teks (titik kiri atas sprite = titik gambar teks)
+        composite_sprite(image, text_sprite, position, opacity)
+    else:
+        # Buat overlay untuk OpenCV text
+        overlay = image.copy() # Salinan ini digunakan untuk menempatkan teks secara terpisah dari gambar asli, yang memungkinkan pengaturan transparansi (opacity) melalui efek overlay. 
+        cv2.putText(overlay, text, position, font, font_scale, font_color, thickness, cv2.LINE_AA) # cv2.LINE_AA: jenis garis anti-aliasing untuk membuat tepi teks lebih halus.
+        cv2.addWeighted(overlay, opacity, image, 1 - opacity, 0, image) # Menggabungkan gambar overlay dengan teks dan gambar asli (image) menggunakan efek transparansi. 
+
+    return image
+
+def get_text_position(image_size, text_size, position_str):
+    """Mengembalikan titik teks (x, y) untuk gambar berukuran image_size (h, w) berdasarkan string posisi."""
+    image_h, image_w = image_size
+    text_w, text_h = text_size
+
     positions = {
         "atas kanan": (image_w - text_w - 10, text_h + 10),
         "tengah kanan": (image_w - text_w - 10, (image_h + text_h) // 2),
@@ -127,22 +147,19 @@ def add_text_watermark(image, text, position_str, font_type='hershey simplex', f
     if y < 0:  # Jika teks keluar batas atas gambar
         y = text_h + 10
 
-    position = (x, y)
+    return (x, y)
 
-    if external_font_used:
-        # Ubah warna font ke format RGB untuk Pillow
-        font_color_rgb = font_color[::-1]  # Membalik urutan dari BGR ke RGB
-        
-        # Tambahkan teks ke gambar menggunakan Pillow untuk font eksternal
-        draw.text(position, text, fill=font_color_rgb, font=font)
-        image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR) # Convert kembali dalam bentuk format openCV
-    else:
-        # Buat overlay untuk OpenCV text
-        overlay = image.copy() # Salinan ini digunakan untuk menempatkan teks secara terpisah dari gambar asli, yang memungkinkan pengaturan transparansi (opacity) melalui efek overlay. 
-        cv2.putText(overlay, text, position, font, font_scale, font_color, thickness, cv2.LINE_AA) # cv2.LINE_AA: jenis garis anti-aliasing untuk membuat tepi teks lebih halus.
-        cv2.addWeighted(overlay, opacity, image, 1 - opacity, 0, image) # Menggabungkan gambar overlay dengan teks dan gambar asli (image) menggunakan efek transparansi. 
+def render_text_sprite(text, font_type, image_size, font_color, scale_factor=0.3, thickness=2):
+    """Merender teks sekali ke sprite BGRA kecil (warna seragam, alpha dari glyph) dengan ukuran seperti add_text_watermark.
 
-    return image
+    Mengembalikan (sprite, anchor, text_size): anchor adalah letak titik posisi teks di dalam sprite
+    (baseline kiri untuk font OpenCV, kiri atas untuk font TTF), sehingga sprite ditempel di posisi - anchor.
+    """
+    image_h, image_w = image_size
+    if font_type.lower() in get_cv2_fonts():
+        return build_text_sprite(text, get_cv2_font(font_type), scale_factor * min(image_w, image_h) / 150, font_color, thickness)
+    # Sprite teks TTF diambil dari cache registry font
+    return build_text_sprite(text, font_type, int(scale_factor * min(image_w, image_h) / 10), font_color, thickness)
 
 def get_cv2_font(font_name):
     """Mengembalikan font OpenCV berdasarkan nama."""
@@ -176,12 +193,48 @@ def get_cv2_fonts():
         "hershey script complex"
     }
 
-def preprocess_image(image):
-    """Melakukan preprocessing pada gambar."""
-    # Adjust gamma
-    gamma_corrected = adjust_gamma(image, gamma=1.0)
+# Profil enhancement: metode denoise yang dipakai sebelum penajaman (None = tanpa enhancement).
+# 'quality' adalah perilaku lama (NL-means berwarna penuh), profil lain menukar sedikit kualitas dengan kecepatan.
+ENHANCEMENT_PROFILES = {
+    'off': None,
+    'fast': 'bilateral',     # Bilateral filter kecil, tanpa NL-means
+    'balanced': 'luma',      # NL-means hanya pada luma (jendela pencarian kecil), chroma dihaluskan lewat resize
+    'quality': 'nlmeans',    # fastNlMeansDenoisingColored resolusi penuh (perilaku lama)
+}
+
+def get_enhancement_profile(enchance_quality):
+    """Mengubah nilai enchance_quality (bool, None atau nama profil) menjadi nama profil enhancement.
+
+    Dipakai untuk gambar dan video (video_watermark_choice.VIDEO_ENHANCEMENT_PROFILES memakai nama profil yang sama).
+    """
+    if enchance_quality is None or enchance_quality is False:
+        return 'off'
+    if enchance_quality is True:
+        return 'quality'  # Kompatibel dengan nilai boolean lama
+
+    profile = str(enchance_quality).lower()
+    if profile not in ENHANCEMENT_PROFILES:
+        raise ValueError(f"Profil enhancement '{enchance_quality}' tidak dikenal. Pilih salah satu: {', '.join(ENHANCEMENT_PROFILES)}.")
+    return profile
+
+def preprocess_image(image, profile='quality', gamma=1.0, denoise_scale=1.0):
+    """Melakukan preprocessing pada gambar sesuai profil enhancement (lihat ENHANCEMENT_PROFILES).
+
+    denoise_scale < 1 membuat profil 'balanced' menjalankan denoise pada luma yang diperkecil.
+    """
+    denoise = ENHANCEMENT_PROFILES[get_enhancement_profile(profile)]
+    if denoise is None:
+        return image
+
+    # Adjust gamma (dilewati jika gamma 1.0 karena tidak mengubah gambar)
+    gamma_corrected = adjust_gamma(image, gamma=gamma)
     # Remove noise
-    denoised_image = remove_noise(gamma_corrected)
+    if denoise == 'bilateral':
+        denoised_image = cv2.bilateralFilter(gamma_corrected, 5, 40, 5)
+    elif denoise == 'luma':
+        denoised_image = remove_noise_luma(gamma_corrected, scale=denoise_scale)
+    else:
+        denoised_image = remove_noise(gamma_corrected)
     # Sharpen the image
     sharpened_image = sharpen_image(denoised_image)
     # Unblur the image
@@ -191,6 +244,8 @@ def preprocess_image(image):
 
 def adjust_gamma(image, gamma=1.0):
     """Menerapkan penyesuaian gamma pada gambar. Tingkat kecerahan gambar"""
+    if gamma == 1.0:
+        return image  # LUT identitas, tidak perlu dihitung
     invGamma = 1.0 / gamma # Menghitung nilai kebalikan dari gamma, invGamma. Nilai ini digunakan untuk menentukan seberapa besar perubahan kecerahan gambar. Nilai gamma di atas 1 akan membuat gambar lebih gelap, sementara nilai di bawah 1 akan membuat gambar lebih terang.
     table = np.array([((i / 255.0) ** invGamma) * 255 for i in np.arange(0, 256)]).astype("uint8") #  melakukan operasi penyesuaian gamma untuk setiap nilai pixel
     return cv2.LUT(image, table) # mengonversi setiap nilai pixel dalam gambar sesuai tabel
@@ -209,6 +264,26 @@ def remove_noise(image):
     #searchWindowSize=21: Ukuran jendela pencarian untuk menemukan area serupa di sekitar piksel. Ukuran yang lebih besar akan meningkatkan kualitas penghilangan noise tetapi menambah waktu pemrosesan.
     return cv2.fastNlMeansDenoisingColored(image, None, h=10, templateWindowSize=7, searchWindowSize=21)
 
+def remove_noise_luma(image, scale=1.0, h=10, search_window=11):
+    """Denoise cepat: NL-means hanya pada channel luma (jendela pencarian lebih kecil), chroma dihaluskan lewat resize.
+
+    Noise warna cukup dihilangkan dengan chroma resolusi setengah. scale < 1 menjalankan NL-means pada luma
+    yang diperkecil lalu diperbesar kembali (lebih cepat lagi, tetapi detail halus ikut sedikit hilang).
+    """
+    image_h, image_w = image.shape[:2]
+    ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+    small = cv2.resize(ycrcb, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+
+    if scale < 1.0:
+        luma = cv2.resize(ycrcb[:, :, 0], None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        luma = cv2.fastNlMeansDenoising(luma, None, h=h, templateWindowSize=7, searchWindowSize=search_window)
+        ycrcb[:, :, 0] = cv2.resize(luma, (image_w, image_h), interpolation=cv2.INTER_CUBIC)
+    else:
+        ycrcb[:, :, 0] = cv2.fastNlMeansDenoising(ycrcb[:, :, 0], None, h=h, templateWindowSize=7, searchWindowSize=search_window)
+
+    ycrcb[:, :, 1:] = cv2.resize(small[:, :, 1:], (image_w, image_h), interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+
 # def unblur_image(image):
 #     """Mengurangi blur pada gambar menggunakan filter Laplacian."""
 #     laplacian_filter = cv2.Laplacian(image, cv2.CV_64F) # metode yang menggunakan filter Laplacian untuk mendeteksi tepi pada gambar
@@ -230,36 +305,28 @@ def remove_background(logo):
     """Menghilangkan latar belakang dari logo menggunakan thresholding."""
     gray = cv2.cvtColor(logo, cv2.COLOR_BGR2GRAY)
 
-    # Cek untuk background hitam
-    is_black_background = np.mean(gray) < 50  # Threshold untuk mendeteksi latar belakang hitam
-
-    # Membuat mask berdasarkan thresholding
-    _, mask = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
-
-    # Menggunakan mask untuk menghilangkan latar belakang
-    logo_with_mask = cv2.bitwise_and(logo, logo, mask=mask)
-
-    # Cek jumlah saluran logo
-    if logo.shape[2] == 3:  # RGB
-        # Jika logo adalah RGB, buat alpha channel dengan nilai penuh
-        b, g, r = cv2.split(logo)
-        alpha_channel = np.zeros(b.shape, dtype=b.dtype)  # Alpha channel kosong
-        alpha_channel[mask > 0] = 255  # Set alpha channel menjadi 255 di area yang tidak putih
-        logo_rgba = cv2.merge((b, g, r, alpha_channel))
-    elif logo.shape[2] == 4:  # RGBA
-        # Jika logo sudah memiliki alpha channel
-        b, g, r, a = cv2.split(logo)
-        # Buat mask baru yang berdasarkan warna putih
-        new_mask = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)[1]  # Mask untuk area putih
-        a[new_mask == 255] = 0  # Set alpha channel menjadi 0 di area putih
-        logo_rgba = cv2.merge((b, g, r, a))
-
-    # Jika latar belakang hitam, set alpha channel menjadi 0 di area hitam
-    if is_black_background:
-        alpha_channel[gray < 50] = 0  # Set alpha channel menjadi 0 di area hitam
+    # Alpha dihitung langsung dari mask: area putih (> 240) menjadi transparan
+    _, alpha = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
+    if logo.shape[2] == 4:
+        # Logo yang sudah memiliki alpha channel: area putih ikut dibuat transparan
+        alpha = np.minimum(logo[:, :, 3], alpha)
 
+    # Susun BGRA sekali tanpa split/merge channel
+    logo_rgba = np.empty(logo.shape[:2] + (4,), dtype=logo.dtype)
+    logo_rgba[:, :, :3] = logo[:, :, :3]
+    logo_rgba[:, :, 3] = alpha
     return logo_rgba
 
+def preprocess_logo_cached(logo, image_size, scale_factor=0.2, logo_key=None):
+    """Seperti preprocess_logo, tetapi sprite diambil dari cache proses jika isi logo dan ukuran target sama.
+
+    logo_key (hash isi logo dari load_logo_entry/logo_content_key) sebaiknya dihitung sekali oleh pemanggil.
+    """
+    if logo_key is None:
+        logo_key = logo_content_key(logo)
+    scale_size = int(min(image_size) * scale_factor)
+    return logo_cache.get_or_create(('image', logo_key, scale_size, scale_size), lambda: preprocess_logo(logo, image_size, scale_factor))
+
 def add_logo_watermark(image, logo, position_str, opacity):
     """Menambahkan watermark logo ke gambar dengan transparansi di posisi yang ditentukan."""
 
@@ -272,23 +339,19 @@ def add_logo_watermark(image, logo, position_str, opacity):
     position = get_watermark_position(image, logo, position_str)
 
     # Tambahkan logo ke gambar dengan transparansi
-    # Mengambil nilai pixel dari logo.
-    # Mengalikan nilai pixel logo dengan nilai transparansi yang telah disesuaikan.
-    # Mengambil nilai pixel dari gambar asli di area yang sama.
-    # Mengalikan nilai pixel gambar asli dengan nilai kebalikannya dari transparansi logo.
-    # Menjumlahkan kedua hasil tersebut untuk mendapatkan nilai akhir pixel yang akan ditetapkan di gambar utama.
-    for c in range(0, 3):
-        image[position[1]:position[1]+logo.shape[0], position[0]:position[0]+logo.shape[1], c] = \
-            (logo[:, :, c] * (logo[:, :, 3] / 255.0 * opacity) +
-             image[position[1]:position[1]+logo.shape[0], position[0]:position[0]+logo.shape[1], c] *
-             (1.0 - logo[:, :, 3] / 255.0 * opacity))
-
-    return image
+    # Alpha logo dikali opacity di-precompute sekali (fixed-point), lalu ketiga channel dicampur
+    # dalam satu operasi vektor hanya pada area logo (ROI), langsung di dalam gambar tanpa salinan penuh.
+    # Bagian logo yang keluar dari batas gambar otomatis dipotong.
+    return composite_sprite(image, logo, position, opacity)
 
 def get_watermark_position(image, watermark, position_str):
     """Mengembalikan koordinat (x, y) berdasarkan string posisi yang diberikan."""
-    image_h, image_w, _ = image.shape
-    logo_h, logo_w, _ = watermark.shape
+    return get_watermark_position_for_size(image.shape[:2], watermark.shape[:2], position_str)
+
+def get_watermark_position_for_size(image_size, watermark_size, position_str):
+    """Mengembalikan koordinat (x, y) kiri atas watermark berukuran watermark_size (h, w) pada gambar berukuran image_size (h, w)."""
+    image_h, image_w = image_size
+    logo_h, logo_w = watermark_size
 
     positions = {
         'atas kanan' : (image_w - logo_w, 0),#"kanan atas"
@@ -305,62 +368,96 @@ def get_watermark_position(image, watermark, position_str):
     return positions.get(position_str.lower(), (image_w - logo_w, image_h - logo_h))
     #return positions.get(position_str, (image_w - logo_w, image_h - logo_h))
 
-def calculate_saliency(image):
-    """Menghitung peta saliency untuk gambar."""
+def resize_for_saliency(image, max_side=None):
+    """Gambar kerja saliency: image diperkecil (INTER_AREA) agar sisi terpanjangnya max_side (None = ukuran asli)."""
+    if max_side and max(image.shape[:2]) > max_side:
+        scale = max_side / max(image.shape[:2])
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image
+
+def compute_saliency_map(image):
+    """Menghitung peta saliency (float32, 0..1) pada ukuran image apa adanya."""
     saliency = cv2.saliency.StaticSaliencyFineGrained_create()
     (success, saliencyMap) = saliency.computeSaliency(image)
-    return saliencyMap
-
-def find_optimal_position(image, watermark_size):
-    """Menemukan posisi optimal untuk menempatkan watermark berdasarkan analisis gambar."""
-    saliencyMap = calculate_saliency(image)
-    saliencyMap = cv2.GaussianBlur(saliencyMap, (5, 5), 0)
-
-    # Invert saliency map untuk mencari area yang paling "tidak penting"
-    inverted_map = 1.0 - saliencyMap
-
-    # Rescale inverted map untuk ukuran watermark
+    if saliencyMap.dtype == np.uint8:
+        return saliencyMap.astype(np.float32) / 255.0
+    return saliencyMap.astype(np.float32, copy=False)
+
+def calculate_saliency(image, max_side=None):
+    """Menghitung peta saliency (float32, 0..1) untuk gambar.
+
+    max_side membatasi sisi terpanjang gambar kerja: gambar diperkecil (INTER_AREA) sebelum saliency dihitung,
+    sehingga peta yang dihasilkan berukuran gambar kerja tersebut, bukan ukuran gambar asli.
+    """
+    return compute_saliency_map(resize_for_saliency(image, max_side))
+
+def get_saliency_map(image, max_side=None):
+    """Seperti calculate_saliency, tetapi peta diambil dari cache saliency jika gambar kerja yang sama pernah dihitung.
+
+    Cache dicari dengan hash gambar kerja yang sudah diperkecil, bukan gambar resolusi penuh. Peta hasil cache
+    bersifat read-only (lihat saliency_cache.configure_saliency_cache untuk sidecar .npy dan mematikan cache).
+    """
+    return saliency_cache.get_or_compute(resize_for_saliency(image, max_side), compute_saliency_map)
+
+def window_saliency_sums(saliency_map, window_size):
+    """Total saliency setiap kandidat jendela berukuran window_size (h, w); elemen [y, x] untuk jendela dengan kiri atas (x, y).
+
+    Dihitung sekaligus dari integral image (4 lookup per jendela), jadi seluruh area watermark dinilai, bukan satu piksel saja.
+    """
+    map_h, map_w = saliency_map.shape[:2]
+    window_h, window_w = min(window_size[0], map_h), min(window_size[1], map_w)
+
+    integral = cv2.integral(saliency_map, sdepth=cv2.CV_64F)
+    return (integral[window_h:, window_w:] - integral[:map_h - window_h + 1, window_w:]
+            - integral[window_h:, :map_w - window_w + 1] + integral[:map_h - window_h + 1, :map_w - window_w + 1])
+
+def find_least_salient_window(saliency_map, window_size):
+    """Mengembalikan (x, y) kiri atas jendela berukuran window_size (h, w) dengan total saliency terkecil."""
+    window_sums = window_saliency_sums(saliency_map, window_size)
+    y, x = np.unravel_index(np.argmin(window_sums), window_sums.shape)
+    return int(x), int(y)
+
+def find_optimal_position(image, watermark_size, max_side=512, saliency_map=None):
+    """Menemukan posisi optimal (x, y) untuk watermark berukuran watermark_size (h, w): area yang paling tidak penting.
+
+    Saliency dihitung pada gambar kerja dengan sisi terpanjang max_side (None = resolusi penuh), semua jendela
+    seukuran watermark dinilai lewat integral image, lalu jendela terbaik dipetakan kembali ke resolusi penuh.
+    saliency_map yang sudah dihitung sebelumnya (dengan max_side yang sama) bisa diberikan agar tidak dihitung ulang.
+    """
+    image_h, image_w = image.shape[:2]
     h, w = watermark_size
 
     # Pastikan ukuran watermark tidak lebih besar dari gambar
-    if w >= image.shape[1] or h >= image.shape[0]:
+    if w >= image_w or h >= image_h:
         raise ValueError("Ukuran watermark lebih besar dari gambar. Sesuaikan ukuran watermark.")
 
-    if w >= image.shape[1] or h >= image.shape[0]:
-        scale_factor = min(image.shape[1] / w, image.shape[0] / h)
-        w = int(w * scale_factor)
-        h = int(h * scale_factor)
-        watermark_size = (w, h)  # Update ukuran watermark
-
-    resized_map = cv2.resize(inverted_map, (image.shape[1] - w, image.shape[0] - h))
+    if saliency_map is None:
+        saliency_map = get_saliency_map(image, max_side)
 
-    # Temukan posisi dengan nilai terkecil (paling gelap di inverted map)
-    min_val, _, min_loc, _ = cv2.minMaxLoc(resized_map)
+    # Ukuran watermark pada resolusi gambar kerja
+    scale_x, scale_y = saliency_map.shape[1] / image_w, saliency_map.shape[0] / image_h
+    window_size = (max(1, int(round(h * scale_y))), max(1, int(round(w * scale_x))))
+    x, y = find_least_salient_window(saliency_map, window_size)
 
-    optimal_position = (min_loc[0], min_loc[1])
+    # Petakan kembali ke resolusi penuh dan jaga agar watermark tetap di dalam gambar
+    x = min(max(int(round(x / scale_x)), 0), image_w - w)
+    y = min(max(int(round(y / scale_y)), 0), image_h - h)
+    return (x, y)
 
-    return optimal_position
+def add_watermark_with_auto_position(image, watermark, font_type='hershey simplex',watermark_type='logo', font_color=(255, 255, 255), font_scale=1, thickness=2, opacity=1.0, saliency_max_side=512, saliency_map=None):
+    """Menambahkan watermark pada posisi optimal di gambar (saliency dihitung pada sisi terpanjang saliency_max_side).
 
-def add_watermark_with_auto_position(image, watermark, font_type='hershey simplex',watermark_type='logo', font_color=(255, 255, 255), font_scale=1, thickness=2, opacity=1.0):
-    """Menambahkan watermark pada posisi optimal di gambar."""
+    saliency_map yang sudah dihitung untuk gambar yang sama (boleh dari versi ukuran lain) dipakai tanpa menghitung ulang.
+    """
     if watermark_type == 'logo':
         h, w, _ = watermark.shape
-        optimal_position = find_optimal_position(image, (h, w))
+        optimal_position = find_optimal_position(image, (h, w), saliency_max_side, saliency_map)
 
-        # Menambahkan logo di posisi optimal dengan opacity
-        overlay = image.copy()
-        for c in range(0, 3):
-            overlay[optimal_position[1]:optimal_position[1]+h, optimal_position[0]:optimal_position[0]+w, c] = \
-                (watermark[:, :, c] * (watermark[:, :, 3] / 255.0) +
-                 image[optimal_position[1]:optimal_position[1]+h, optimal_position[0]:optimal_position[0]+w, c] *
-                 (1.0 - watermark[:, :, 3] / 255.0))
-
-        # Menggabungkan logo dengan transparansi
-        cv2.addWeighted(overlay, opacity, image, 1 - opacity, 0, image)
+        # Menambahkan logo di posisi optimal dengan opacity (hanya pada ROI logo)
+        composite_sprite(image, watermark, optimal_position, opacity)
 
     elif watermark_type == 'text':
         font = None
-        overlay=image.copy()
         # Try to get OpenCV font
         try:
             font = get_cv2_font(font_type)  # Try to get OpenCV font
@@ -371,46 +468,26 @@ def add_watermark_with_auto_position(image, watermark, font_type='hershey simple
 
         if font is not None:
             # If font is found in OpenCV
-            text_size, _ = cv2.getTextSize(watermark, font, font_scale, thickness)
+            text_size, baseline = cv2.getTextSize(watermark, font, font_scale, thickness)
             text_w, text_h = text_size
 
-            optimal_position = find_optimal_position(image, (text_w, text_h))
-            optimal_position = (max(optimal_position[0], 0),
-                                max(optimal_position[1], 0))
-            optimal_position = (min(optimal_position[0], image.shape[1] - text_w),
-                                min(optimal_position[1], image.shape[0] - text_h))
-            # max() untuk memastikan bahwa koordinat x dan y dari optimal_position tidak negatif, sehingga posisi berada dalam area gambar dan tidak keluar dari batas kiri atau atas gambar.
-            # min() memastikan bahwa posisi x dan y dari optimal_position tidak melampaui batas kanan atau bawah gambar. 
+            # Jendela teks termasuk bagian di bawah baseline; putText memakai titik kiri bawah (baseline)
+            x, y = find_optimal_position(image, (text_h + baseline, text_w), saliency_max_side, saliency_map)
+            optimal_position = (x, y + text_h)
             overlay = image.copy()
             cv2.putText(overlay, watermark, optimal_position, font, font_scale, font_color, thickness, cv2.LINE_AA)
-        else:
-            # If font not found in OpenCV, check for TTF file
-            ttf_font_path = os.path.join('Font', f"{font_type}.ttf")
-            print(f"Looking for font at: {ttf_font_path}")  # Debug output
-            if os.path.exists(ttf_font_path):
-                #print("Font file found.")  # Debug output
-                pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-                draw = ImageDraw.Draw(pil_image)
-                font = ImageFont.truetype(ttf_font_path, int(font_scale * 20))  # Adjust size as necessary
-                
-                # Get text bounding box with PIL
-                text_bbox = draw.textbbox((0, 0), watermark, font=font)
-                text_w = text_bbox[2] - text_bbox[0]
-                text_h = text_bbox[3] - text_bbox[1]
-
-                optimal_position = find_optimal_position(image, (text_w, text_h))
 
-                # Convert font_color to RGB for PIL
-                font_color = font_color[::-1]  # Membalik urutan dari BGR ke RGB
-                draw.text(optimal_position, watermark, font=font, fill=font_color)
+            # Combine overlay with the original image using opacity
+            cv2.addWeighted(overlay, opacity, image, 1 - opacity, 0, image)
+        else:
+            # If font not found in OpenCV, render the TTF text once into a small sprite (font registry, raises ValueError if missing)
+            text_sprite, _ = render_ttf_text(watermark, font_type, int(font_scale * 20), font_color)  # Adjust size as necessary
 
-                # Convert back to OpenCV image
-                image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            else:
-                raise ValueError(f"Font TTF '{ttf_font_path}' tidak ditemukan.")
+            # Jendela sama dengan area sprite (termasuk offset bbox dari titik gambar teks), seperti pada logo
+            optimal_position = find_optimal_position(image, text_sprite.shape[:2], saliency_max_side, saliency_map)
 
-        # Combine overlay with the original image using opacity
-        cv2.addWeighted(overlay, opacity, image, 1 - opacity, 0, image)
+            # Blend the text sprite with opacity only over the text region
+            composite_sprite(image, text_sprite, optimal_position, opacity)
 
     return image
 
@@ -453,35 +530,29 @@ def add_watermark_below_image(image, font_type='hershey simplex', text=None, bar
         cv2.addWeighted(text_overlay[h:, :], opacity, combined_image[h:, :], 1 - opacity, 0, combined_image[h:, :])
 
     else:
-        # Jika font tidak ditemukan di OpenCV, cari file TTF
-        ttf_font_path = os.path.join('Font', f"{font_type}.ttf")
-        print(f"Looking for font at: {ttf_font_path}")  # Debug output
-        if os.path.exists(ttf_font_path):
-            #print("Font file found.")  # Debug output
-            # Convert OpenCV image to PIL image
-            pil_image = Image.fromarray(cv2.cvtColor(combined_image, cv2.COLOR_BGR2RGB))
-            draw = ImageDraw.Draw(pil_image)
-            font = ImageFont.truetype(ttf_font_path, int(scaled_font_scale * 20))  # Adjust size as necessary
-            
-            # Get text bounding box with PIL
-            text_size = draw.textbbox((0, 0), text, font=font)
-            text_w = text_size[2] - text_size[0]
-            text_h = text_size[3] - text_size[1]
+        # Jika font tidak ditemukan di OpenCV, render teks TTF sekali ke sprite kecil (registry font, ValueError jika tidak ada)
+        text_sprite, text_size = render_ttf_text(text, font_type, int(scaled_font_scale * 20), font_color)  # Adjust size as necessary
+        text_w = text_size[2] - text_size[0]
+        text_h = text_size[3] - text_size[1]
 
-            text_x = w - text_w - 10  # Teks di sebelah kanan dengan padding 10 px
-            text_y = h + (bar_height + text_h) // 2
+        text_x = w - text_w - 10  # Teks di sebelah kanan dengan padding 10 px
+        text_y = h + (bar_height + text_h) // 2
 
-            # Convert font_color to RGB for PIL
-            font_color = font_color[::-1] 
-            draw.text((text_x, text_y), text, font=font, fill=font_color)
-
-            # Convert back to OpenCV image
-            combined_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        else:
-            raise ValueError(f"Font TTF '{ttf_font_path}' tidak ditemukan.")
+        # Tempel sprite teks dengan opacity hanya pada area teks di bar
+        composite_sprite(combined_image, text_sprite, (text_x, text_y), opacity)
 
     return combined_image
 
+def get_watermark_sprite(image_size, watermark_type, position_str, text=None, font_type='hershey simplex', font_color=(255, 255, 255), logo_image=None, scale_factor=0.3, thickness=2, logo_key=None):
+    """Menyiapkan sprite watermark BGRA beserta posisi kiri atasnya untuk gambar berukuran image_size (h, w), tanpa butuh piksel gambar."""
+    if watermark_type == 'logo':
+        sprite = preprocess_logo_cached(logo_image, image_size=image_size, scale_factor=scale_factor, logo_key=logo_key)
+        return sprite, get_watermark_position_for_size(image_size, sprite.shape[:2], position_str)
+
+    sprite, anchor, text_size = render_text_sprite(text, font_type, image_size, get_color_from_string(font_color), scale_factor, thickness)
+    x, y = get_text_position(image_size, text_size, position_str)
+    return sprite, (x - anchor[0], y - anchor[1])
+
 def remove_white_background(image, margin=0):
     # Convert image ke format grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -505,7 +576,185 @@ def remove_white_background(image, margin=0):
         # Jika tidak ada kontur, kembalikan gambar asli
         return image
 
-def process_multiple_files(file_paths, watermark_type=None, enchance_quality=None, font_type=None, text=None, logo_path=None, position_str=None, opacity=None, bar_height=50, font_color=(255, 255, 255), scale_factor=0.3, thickness=2, output_format=None):
+def iter_pdf_pages(pdf_path, dpi=300, page_window=4, thread_count=1):
+    """Generator (index, halaman PIL) yang merender PDF per jendela page_window halaman.
+
+    Hanya page_window halaman yang berada di memori pada satu waktu, berapapun jumlah halaman dokumen.
+    thread_count > 1 membagi halaman dalam satu jendela ke beberapa proses poppler sekaligus.
+    pdf_path boleh berupa isi PDF (bytes): isi tersebut ditulis sekali ke file sementara (dihapus setelah selesai)
+    dan semua jendela halaman dirender dari file itu.
+    """
+    temp_path = None
+    if isinstance(pdf_path, (bytes, bytearray, memoryview)):
+        # pdf2image menulis ulang bytes ke file sementara di setiap panggilan; cukup sekali untuk seluruh dokumen
+        fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(pdf_path)
+        pdf_path = temp_path
+
+    try:
+        page_count = pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)['Pages']
+        for first_page in range(1, page_count + 1, page_window):
+            last_page = min(first_page + page_window - 1, page_count)
+            pages = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page, thread_count=thread_count, poppler_path=POPPLER_PATH)
+            for offset, page in enumerate(pages):
+                yield first_page - 1 + offset, page
+            del pages  # Lepaskan jendela halaman sebelum merender jendela berikutnya
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+
+def watermark_pdf_page(open_cv_image, watermark_type, metrics=None, **options):
+    """Memproses satu halaman PDF hasil render (BGR): crop latar putih, preprocessing opsional, lalu watermark."""
+    with measure_stage(metrics, 'crop'):
+        open_cv_image = remove_white_background(open_cv_image, margin=0)
+    return watermark_image_array(open_cv_image, watermark_type, metrics=metrics, **options)
+
+def watermark_image_array(open_cv_image, watermark_type, enchance_quality=None, font_type=None, text=None, logo_image=None, position_str=None, opacity=None, bar_height=50, font_color=(255, 255, 255), scale_factor=0.3, thickness=2, saliency_max_side=512, logo_key=None, saliency_map=None, metrics=None, denoise_scale=1.0):
+    """Memproses satu gambar BGR yang sudah di-decode: preprocessing opsional lalu watermark teks atau logo.
+
+    saliency_map (opsional) adalah peta saliency gambar yang sama untuk posisi 'auto', agar tidak dihitung ulang.
+    metrics (JobMetrics, opsional) mencatat tahap enhance, saliency, logo_prepare dan composite.
+    denoise_scale < 1 menjalankan denoise profil 'balanced' pada luma yang diperkecil (lihat remove_noise_luma).
+    """
+    # Profil di-resolve dulu: 'off' adalah string yang bernilai True
+    profile = get_enhancement_profile(enchance_quality)
+    if profile != 'off':
+        with measure_stage(metrics, 'enhance'):
+            open_cv_image = preprocess_image(open_cv_image, profile=profile, denoise_scale=denoise_scale)
+
+    # Peta saliency dihitung di sini (bukan di dalam find_optimal_position) agar tercatat sebagai tahap sendiri
+    if position_str == 'auto' and saliency_map is None and watermark_type in ('text', 'logo'):
+        with measure_stage(metrics, 'saliency'):
+            saliency_map = get_saliency_map(open_cv_image, saliency_max_side)
+
+    # Watermark teks
+    if watermark_type == 'text':
+        with measure_stage(metrics, 'composite'):
+            if position_str == 'luar gambar':
+                return add_watermark_below_image(
+                    open_cv_image, text=text, bar_height=bar_height, opacity=opacity,
+                    font_color=font_color, font_type=font_type, scale_factor=scale_factor, font_scale=1, thickness=thickness
+                )
+            elif position_str == 'auto':
+                return add_watermark_with_auto_position(
+                    open_cv_image, text, watermark_type='text', font_color=font_color, font_type=font_type, thickness=thickness, opacity=opacity,
+                    saliency_max_side=saliency_max_side, saliency_map=saliency_map
+                )
+            return add_text_watermark(
+                open_cv_image, text, position_str, font_color=font_color, font_type=font_type, opacity=opacity, thickness=thickness
+            )
+
+    # Watermark logo
+    with measure_stage(metrics, 'logo_prepare'):
+        logo = preprocess_logo_cached(logo_image, image_size=open_cv_image.shape[:2], scale_factor=scale_factor, logo_key=logo_key)
+    with measure_stage(metrics, 'composite'):
+        if position_str == 'auto':
+            return add_watermark_with_auto_position(open_cv_image, logo, watermark_type='logo', opacity=opacity, saliency_max_side=saliency_max_side, saliency_map=saliency_map)
+        return add_logo_watermark(open_cv_image, logo, position_str, opacity=opacity)
+
+# Opsi watermark halaman PDF (logo ter-decode, warna, dll.) untuk proses worker, dikirim sekali per worker
+_pdf_page_options = {}
+
+def _init_pdf_page_worker(page_options):
+    """Menyimpan opsi watermark halaman PDF di proses worker."""
+    _pdf_page_options.update(page_options)
+
+def _watermark_pdf_page_in_worker(open_cv_image):
+    """Memproses satu halaman PDF di proses worker dengan opsi dari _init_pdf_page_worker."""
+    return watermark_pdf_page(open_cv_image, **_pdf_page_options)
+
+def iter_watermarked_pdf_pages(pdf_path, page_options, page_window=4, workers=1, metrics=None):
+    """Generator (index, halaman BGR ter-watermark) sesuai urutan halaman.
+
+    workers > 1: halaman dirender poppler dengan thread_count=workers dan diproses paralel di process pool.
+    Hasil tetap dikembalikan sesuai urutan halaman dan paling banyak 2 * workers halaman diproses
+    bersamaan, sehingga memori tetap terbatas seperti pada pemrosesan berurutan.
+    metrics (JobMetrics, opsional) mencatat tahap render; tahap per halaman (crop, enhance, composite, ...)
+    hanya tercatat jika workers <= 1, karena halaman diproses di proses lain.
+    """
+    # Jendela render minimal sebesar jumlah worker agar semua thread poppler mendapat halaman
+    pages = iter_pdf_pages(pdf_path, dpi=300, page_window=max(page_window, workers), thread_count=workers)
+    pages = measure_iter(metrics, 'render', pages)
+
+    if workers <= 1:
+        for idx, image in pages:
+            yield idx, watermark_pdf_page(cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR), metrics=metrics, **page_options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_page_worker, initargs=(page_options,)) as executor:
+        in_flight = deque()  # (index, future) urut halaman
+        for idx, image in pages:
+            if len(in_flight) >= workers * 2:
+                done_idx, future = in_flight.popleft()
+                yield done_idx, future.result()
+            in_flight.append((idx, executor.submit(_watermark_pdf_page_in_worker, cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR))))
+
+        while in_flight:
+            done_idx, future = in_flight.popleft()
+            yield done_idx, future.result()
+
+def add_watermark_to_pdf_vector(pdf_path, output_path, watermark_type, position_str, opacity, text=None, font_type='hershey simplex', font_color=(255, 255, 255), logo_image=None, scale_factor=0.3, thickness=2, dpi=300, logo_key=None):
+    """Menempelkan watermark sebagai objek overlay langsung ke halaman PDF asli tanpa merender ulang halaman.
+
+    pdf_path boleh berupa path atau isi PDF (bytes), output_path berupa path atau objek file biner.
+    Teks dan vektor asli halaman tetap utuh (teks tetap bisa dipilih). Watermark disiapkan seperti mode
+    raster untuk halaman berukuran dpi (posisi dan opacity sama), lalu disimpan sebagai image XObject kecil
+    dengan SMask. Overlay dibuat sekali per ukuran halaman sehingga objeknya dipakai ulang oleh semua
+    halaman yang berukuran sama dan ukuran file hampir tidak bertambah. Ukuran dan posisi mengikuti cropbox
+    halaman (area yang ditampilkan viewer).
+    """
+    if isinstance(pdf_path, (bytes, bytearray, memoryview)):
+        pdf_path = io.BytesIO(pdf_path)  # Isi PDF di memori
+    writer = PdfWriter(clone_from=PdfReader(pdf_path))
+    overlays = {}  # (lebar, tinggi) halaman dalam point -> halaman overlay
+
+    for page in writer.pages:
+        # Rotasi halaman dipindahkan ke content stream agar koordinat overlay sesuai tampilan halaman
+        page.transfer_rotation_to_content()
+        box = page.cropbox  # Area yang terlihat; sama dengan mediabox jika cropbox tidak diatur
+        page_size = (round(float(box.width), 2), round(float(box.height), 2))
+
+        if page_size not in overlays:
+            image_size = (max(int(round(page_size[1] * dpi / 72.0)), 1), max(int(round(page_size[0] * dpi / 72.0)), 1))
+            sprite, position = get_watermark_sprite(
+                image_size, watermark_type, position_str, text=text, font_type=font_type,
+                font_color=font_color, logo_image=logo_image, scale_factor=scale_factor, thickness=thickness, logo_key=logo_key
+            )
+            overlay_pdf = build_sprite_overlay_pdf(sprite, position, image_size, page_size, opacity)
+            overlays[page_size] = PdfReader(io.BytesIO(overlay_pdf)).pages[0]
+
+        # Overlay digeser ke titik kiri bawah cropbox (tidak selalu di 0, 0)
+        page.merge_transformed_page(overlays[page_size], Transformation().translate(float(box.left), float(box.bottom)))
+
+    if hasattr(output_path, 'write'):
+        writer.write(output_path)  # Objek file biner, misalnya io.BytesIO
+        return output_path
+    with open(output_path, 'wb') as output_file:
+        writer.write(output_file)
+    return output_path
+
+def resolve_logo(logo_path=None, logo_image=None, logo_key=None):
+    """Menyiapkan logo untuk satu file: (logo_image, logo_key, error_message).
+
+    Logo yang sudah di-decode oleh pemanggil (misalnya batch) dipakai langsung; jika tidak, logo_path
+    (path, bytes, objek file, atau array numpy) dibaca lewat cache. Hash isi logo dihitung sekali untuk cache sprite.
+    """
+    if logo_image is None:
+        if logo_path is None:
+            #raise ValueError("Path logo harus disediakan untuk watermark jenis logo.")
+            return None, None, "Error While Embedding Watermark: Path logo harus disediakan untuk watermark jenis logo."
+
+        logo_image, logo_key = load_logo_entry(logo_path)
+        if logo_image is None:
+            #raise ValueError(f"Logo tidak dapat dibuka: {logo_path}")
+            return None, None, "Error While Embedding Watermark: Logo tidak dapat dibuka"
+
+    if logo_key is None:
+        logo_key = logo_content_key(logo_image)
+    return logo_image, logo_key, ''
+
+def process_multiple_files(file_paths, watermark_type=None, enchance_quality=None, font_type=None, text=None, logo_path=None, position_str=None, opacity=None, bar_height=50, font_color=(255, 255, 255), scale_factor=0.3, thickness=2, output_format=None, logo_image=None, pdf_page_window=4, pdf_write_workers=4, pdf_mode='raster', pdf_workers=1, saliency_max_side=512, logo_key=None, metrics=None, denoise_scale=1.0):
     output_files = [os.path.abspath(file_paths), '']  # Inisialisasi list strict dengan 2 item: [file_path, error_message]
      
     try:
@@ -514,97 +763,87 @@ def process_multiple_files(file_paths, watermark_type=None, enchance_quality=Non
             output_files[1] = "Error While Embedding Watermark: file tidak ditemukan"
             return output_files
 
+        # Baca logo sekali saja (atau gunakan logo yang sudah di-decode oleh pemanggil, misalnya batch)
+        if watermark_type == 'logo':
+            with measure_stage(metrics, 'logo_decode'):
+                logo_image, logo_key, output_files[1] = resolve_logo(logo_path, logo_image, logo_key)
+            if output_files[1]:
+                return output_files
+
         # Proses jika file adalah PDF
         if file_paths.lower().endswith('.pdf'):
-            images = convert_from_path(file_paths, dpi=300, poppler_path=r"C:\\Users\\user\\poppler\\poppler-24.07.0\\Library\\bin")
-            watermarked_images = []  # Menyimpan gambar dengan watermark untuk dikonversi kembali ke PDF
-            
-            for idx, image in enumerate(images):
-                open_cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                open_cv_image = remove_white_background(open_cv_image, margin=0)
-                
-                if enchance_quality:
-                    open_cv_image = preprocess_image(open_cv_image)
+            # Mode vektor: watermark ditempel sebagai overlay ke halaman PDF asli tanpa render ulang.
+            # Posisi 'auto' dan 'luar gambar' butuh piksel/ukuran halaman baru, jadi tetap memakai mode raster.
+            if pdf_mode == 'vector' and output_format.lower() == 'pdf' and position_str not in ('auto', 'luar gambar'):
+                if watermark_type == 'text' and text is None:
+                    output_files[1] = "Error While Embedding Watermark: Text harus disediakan untuk watermark jenis teks."
+                    return output_files
 
-                #image_with_watermark = open_cv_image
+                pdf_output_filename = os.path.join(f'Watermarked{os.path.basename(file_paths)}')
+                with measure_stage(metrics, 'pdf_vector'):
+                    add_watermark_to_pdf_vector(
+                        file_paths, pdf_output_filename, watermark_type, position_str, opacity, text=text, font_type=font_type,
+                        font_color=font_color, logo_image=logo_image, scale_factor=scale_factor, thickness=thickness, logo_key=logo_key
+                    )
+                output_files[0] = os.path.abspath(pdf_output_filename)
+                return output_files
+
+            # Halaman dirender dan diproses per jendela kecil (pdf_page_window halaman) agar memori tetap terbatas
+            pdf_output_filename = os.path.join(f'Watermarked{os.path.basename(file_paths)}')
 
-                # Watermark teks
+            # Halaman PNG/JPG ditulis paralel di thread pool, halaman PDF ditulis streaming sekali jalan
+            pdf_writer = StreamingPdfWriter(pdf_output_filename) if output_format.lower() == 'pdf' else None
+            page_writer = ThreadPoolExecutor(max_workers=pdf_write_workers)
+            pending_writes = []
+            write_page = measured(metrics, 'encode', cv2.imwrite)
+            try:
+                # Validasi sekali sebelum halaman mulai dirender
                 if watermark_type == 'text':
                     font_color = get_color_from_string(font_color)
                     if text is None:
                         #raise ValueError("Text harus disediakan untuk watermark jenis teks.")
                         output_files[1] = "Error While Embedding Watermark: Text harus disediakan untuk watermark jenis teks."
                         return output_files
-                    
-                    if position_str == 'luar gambar':
-                        image_with_watermark = add_watermark_below_image(
-                            open_cv_image, text=text, bar_height=bar_height, opacity=opacity,
-                            font_color=font_color, font_type=font_type, scale_factor=scale_factor, font_scale=1, thickness=thickness
-                        )
-                    elif position_str == 'auto':
-                        image_with_watermark = add_watermark_with_auto_position(
-                            open_cv_image, text, watermark_type='text', font_color=font_color, font_type=font_type, thickness=thickness, opacity=opacity
-                        )
-                    else:
-                        image_with_watermark = add_text_watermark(
-                            open_cv_image, text, position_str, font_color=font_color, font_type=font_type, opacity=opacity, thickness=thickness
-                        )
-
-                # Watermark logo
-                elif watermark_type == 'logo':
-                    if logo_path is None:
-                        #raise ValueError("Path logo harus disediakan untuk watermark jenis logo.")
-                        output_files[1] = "Error While Embedding Watermark: Path logo harus disediakan untuk watermark jenis logo."
-                        return output_files
-                    
-                    # Cek apakah logo bukan PNG, jika iya, konversi ke PNG
-                    logo_ext = os.path.splitext(logo_path)[1].lower()
-                    if logo_ext in ['.jpg', '.jpeg']:
-                        logo_image = cv2.imread(logo_path)
-                        if logo_image is not None:
-                            converted_logo_path = logo_path.replace(logo_ext, '.png')
-                            cv2.imwrite(converted_logo_path, logo_image)
-                            logo_path = converted_logo_path  # Set logo_path ke file PNG baru
-                        else:
-                            #raise ValueError(f"Logo tidak dapat dibuka: {logo_path}")
-                            output_files[1] = "Error While Embedding Watermark: Logo tidak dapat dibuka"
-                            return output_files
-                    
-                    logo = preprocess_logo(cv2.imread(logo_path, cv2.IMREAD_UNCHANGED), image_size=open_cv_image.shape[:2], scale_factor=scale_factor)
-                    
-                    if position_str == 'auto':
-                        image_with_watermark = add_watermark_with_auto_position(
-                            open_cv_image, logo, watermark_type='logo', opacity=opacity
-                        )                    
-                    else:
-                        image_with_watermark = add_logo_watermark(
-                            open_cv_image, logo, position_str, opacity=opacity
-                        )
-
-                watermarked_images.append(Image.fromarray(cv2.cvtColor(image_with_watermark, cv2.COLOR_BGR2RGB)))
 
-                base_name = os.path.basename(file_paths)
-                name, ext = os.path.splitext(base_name)
-                output_filename = os.path.join(f'Watermarked{idx + 1}_{name}.{output_format}')
+                page_options = {
+                    'watermark_type': watermark_type, 'enchance_quality': enchance_quality, 'font_type': font_type, 'text': text,
+                    'logo_image': logo_image, 'position_str': position_str, 'opacity': opacity, 'bar_height': bar_height,
+                    'font_color': font_color, 'scale_factor': scale_factor, 'thickness': thickness, 'saliency_max_side': saliency_max_side,
+                    'logo_key': logo_key, 'denoise_scale': denoise_scale
+                }
+                pages = iter_watermarked_pdf_pages(file_paths, page_options, page_window=pdf_page_window, workers=pdf_workers, metrics=metrics)
+                for idx, image_with_watermark in pages:
+                    base_name = os.path.basename(file_paths)
+                    name, ext = os.path.splitext(base_name)
+                    output_filename = os.path.join(f'Watermarked{idx + 1}_{name}.{output_format}')
                 
-                #output_files[0] = output_filename  # Set file path output ke list
-                output_files[0] = os.path.abspath(output_filename)  # Set file path output ke list
-
-                if output_format.lower() == 'jpg' or output_format.lower() == 'jpeg':
-                    cv2.imwrite(output_filename, image_with_watermark, [int(cv2.IMWRITE_JPEG_QUALITY), 100])
-                elif output_format.lower() == 'png':
-                    cv2.imwrite(output_filename, image_with_watermark)
-                elif output_format.lower() == 'pdf':
-                    pdf_output_filename = os.path.join(f'Watermarked{os.path.basename(file_paths)}')
-                    watermarked_images[0].save(pdf_output_filename, save_all=True, append_images=watermarked_images[1:], resolution=300)
-                else:
-                    #raise ValueError("Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'.")
-                    output_files[1] = "Error While Embedding Watermark: Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'."
-                    return output_files
+                    #output_files[0] = output_filename  # Set file path output ke list
+                    output_files[0] = os.path.abspath(output_filename)  # Set file path output ke list
+
+                    # Batasi jumlah halaman yang menunggu ditulis agar memori tetap terbatas
+                    if len(pending_writes) >= pdf_write_workers * 2:
+                        pending_writes.pop(0).result()
+
+                    if output_format.lower() == 'jpg' or output_format.lower() == 'jpeg':
+                        pending_writes.append(page_writer.submit(write_page, output_filename, image_with_watermark, [int(cv2.IMWRITE_JPEG_QUALITY), 100]))
+                    elif output_format.lower() == 'png':
+                        pending_writes.append(page_writer.submit(write_page, output_filename, image_with_watermark))
+                    elif output_format.lower() == 'pdf':
+                        # Halaman langsung ditulis ke PDF output (streaming), tidak ada halaman yang ditulis ulang
+                        with measure_stage(metrics, 'encode'):
+                            pdf_writer.add_page(image_with_watermark, resolution=300)
+                    else:
+                        #raise ValueError("Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'.")
+                        output_files[1] = "Error While Embedding Watermark: Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'."
+                        return output_files
+            finally:
+                if pdf_writer is not None:
+                    pdf_writer.close()
+                for pending in pending_writes:
+                    pending.result()
+                page_writer.shutdown()
 
             if output_format.lower() == 'pdf':
-                pdf_output_filename = os.path.join(f'Watermarked{os.path.basename(file_paths)}')
-                watermarked_images[0].save(pdf_output_filename, save_all=True, append_images=watermarked_images[1:], resolution=300)
                 #output_files[0] = pdf_output_filename  # Set PDF path ke list
                 # Mengubah pdf_output_filename menjadi path absolut
                 output_files[0] = os.path.abspath(pdf_output_filename)  # Set PDF path ke list
@@ -614,70 +853,27 @@ def process_multiple_files(file_paths, watermark_type=None, enchance_quality=Non
 
         else:
             # Jika file yang diupload bukan PDF, proses sebagai gambar
-            image = cv2.imread(file_paths)
+            with measure_stage(metrics, 'decode') as stage:
+                image = cv2.imread(file_paths)
+                stage['bytes_in'] = os.path.getsize(file_paths)
+                stage['bytes_out'] = image.nbytes if image is not None else 0
             if image is None:
                 output_files[1] = f"Gambar tidak ditemukan di path: {file_paths}"
                 return output_files
 
-            if enchance_quality:
-                #print("preproces")
-                preprocessed_image = preprocess_image(image)
-            else:
-                preprocessed_image = image
-
-            #image_with_watermark = preprocessed_image
-
             if watermark_type == 'text':
                 font_color = get_color_from_string(font_color)
                 if text is None:
                     #raise ValueError("Text harus disediakan untuk watermark jenis teks.")
                     output_files[1] = "Error While Embedding Watermark: Text harus disediakan untuk watermark jenis teks."
                     return output_files
-              
-                if position_str == 'luar gambar':
-                    image_with_watermark = add_watermark_below_image(
-                        preprocessed_image, text=text, bar_height=bar_height, opacity=opacity,
-                        font_color=font_color, font_type=font_type, scale_factor=scale_factor, font_scale=1, thickness=thickness
-                    )
-                elif position_str == 'auto':
-                    image_with_watermark = add_watermark_with_auto_position(
-                        preprocessed_image, text, watermark_type='text', font_color=font_color, font_type=font_type, thickness=thickness, opacity=opacity
-                    )
-                else:
-                    image_with_watermark = add_text_watermark(
-                        preprocessed_image, text, position_str, font_color=font_color, font_type=font_type, opacity=opacity, thickness=thickness
-                    )
 
-            elif watermark_type == 'logo':
-                if logo_path is None:
-                    #raise ValueError("Path logo harus disediakan untuk watermark jenis logo.")
-                    output_files[1] = "Error While Embedding Watermark: Path Logo harus disediakan untuk watermark jenis logo."
-                    return output_files
-                
-                 # Cek apakah logo bukan PNG, jika iya, konversi ke PNG
-                logo_ext = os.path.splitext(logo_path)[1].lower()
-                if logo_ext in ['.jpg', '.jpeg']:
-                    logo_image = cv2.imread(logo_path)
-                    if logo_image is not None:
-                        converted_logo_path = logo_path.replace(logo_ext, '.png')
-                        cv2.imwrite(converted_logo_path, logo_image)
-                        logo_path = converted_logo_path  # Set logo_path ke file PNG baru
-                    else:
-                        #raise ValueError(f"Logo tidak dapat dibuka: {logo_path}")
-                        output_files[1] = "Error While Embedding Watermark: Logo tidak dapat dibuka"
-                        return output_files
-                    
-                logo = preprocess_logo(cv2.imread(logo_path, cv2.IMREAD_UNCHANGED), image_size=preprocessed_image.shape[:2], scale_factor=scale_factor)
-                
-                #logo=logo_path
-                if position_str == 'auto':
-                    image_with_watermark = add_watermark_with_auto_position(
-                        preprocessed_image, logo, watermark_type='logo', opacity=opacity
-                    )
-                else:
-                    image_with_watermark = add_logo_watermark(
-                        preprocessed_image, logo, position_str, opacity=opacity
-                    )
+            image_with_watermark = watermark_image_array(
+                image, watermark_type, enchance_quality=enchance_quality, font_type=font_type, text=text, logo_image=logo_image,
+                position_str=position_str, opacity=opacity, bar_height=bar_height, font_color=font_color, scale_factor=scale_factor,
+                thickness=thickness, saliency_max_side=saliency_max_side, logo_key=logo_key, metrics=metrics,
+                denoise_scale=denoise_scale
+            )
 
             # Cek apakah image_with_watermark kosong
             if image_with_watermark is None or image_with_watermark.size == 0:
@@ -692,10 +888,11 @@ def process_multiple_files(file_paths, watermark_type=None, enchance_quality=Non
             # Mengubah output_filename menjadi path absolut
             output_files[0] = os.path.abspath(output_filename)  # Set path output
 
+            write_image = measured(metrics, 'encode', cv2.imwrite)
             if output_format.lower() == 'jpg' or output_format.lower() == 'jpeg':
-                cv2.imwrite(output_filename, image_with_watermark, [int(cv2.IMWRITE_JPEG_QUALITY), 100])
+                write_image(output_filename, image_with_watermark, [int(cv2.IMWRITE_JPEG_QUALITY), 100])
             elif output_format.lower() == 'png':
-                cv2.imwrite(output_filename, image_with_watermark)
+                write_image(output_filename, image_with_watermark)
             else:
                 #raise ValueError("Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'.")
                 output_files[1] = "Error While Embedding Watermark: Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'."
@@ -706,3 +903,220 @@ def process_multiple_files(file_paths, watermark_type=None, enchance_quality=Non
     except Exception as e:
         output_files[1] = f"Error While Embedding Watermark: {str(e)}"
         return output_files
+
+def encode_image(image, output_format):
+    """Meng-encode gambar BGR ke bytes: 'jpg'/'jpeg' (kualitas 100, sama seperti file output) atau 'png'."""
+    if output_format in ('jpg', 'jpeg'):
+        ok, encoded = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), 100])
+    elif output_format == 'png':
+        ok, encoded = cv2.imencode('.png', image)
+    else:
+        raise ValueError("Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', atau 'png'.")
+    if not ok:
+        raise ValueError("Gambar tidak dapat di-encode.")
+    return encoded.tobytes()
+
+def process_image_bytes(data, watermark_type=None, enchance_quality=None, font_type=None, text=None, logo_path=None, position_str=None, opacity=None, bar_height=50, font_color=(255, 255, 255), scale_factor=0.3, thickness=2, output_format='png', logo_image=None, pdf_page_window=4, pdf_mode='raster', pdf_workers=1, saliency_max_side=512, logo_key=None, metrics=None, denoise_scale=1.0):
+    """Seperti process_multiple_files, tetapi input dan output berada di memori (tidak ada file yang ditulis).
+
+    data berupa isi gambar/PDF (bytes, bytearray, memoryview) atau objek file biner. Mengembalikan
+    [output, error_message] dengan output bytes hasil encode untuk output_format 'png', 'jpg'/'jpeg'
+    atau 'pdf' (khusus input PDF), atau array numpy BGR untuk output_format 'array'. Input PDF dengan
+    output gambar menghasilkan list berisi satu output per halaman. metrics (JobMetrics, opsional) mencatat
+    waktu per tahap seperti pada process_multiple_files.
+    """
+    output = [None, '']  # [output, error_message], sama seperti [file_path, error_message] pada versi file
+
+    try:
+        if hasattr(data, 'read'):
+            data = data.read()
+        data = memoryview(data)
+        output_format = (output_format or 'png').lower()
+
+        if watermark_type == 'logo':
+            with measure_stage(metrics, 'logo_decode'):
+                logo_image, logo_key, output[1] = resolve_logo(logo_path, logo_image, logo_key)
+            if output[1]:
+                return output
+        elif watermark_type == 'text':
+            font_color = get_color_from_string(font_color)
+            if text is None:
+                output[1] = "Error While Embedding Watermark: Text harus disediakan untuk watermark jenis teks."
+                return output
+
+        page_options = {
+            'enchance_quality': enchance_quality, 'font_type': font_type, 'text': text, 'logo_image': logo_image,
+            'position_str': position_str, 'opacity': opacity, 'bar_height': bar_height, 'font_color': font_color,
+            'scale_factor': scale_factor, 'thickness': thickness, 'saliency_max_side': saliency_max_side, 'logo_key': logo_key,
+            'denoise_scale': denoise_scale
+        }
+
+        if output_format not in ('png', 'jpg', 'jpeg', 'pdf', 'array'):
+            output[1] = "Error While Embedding Watermark: Format output tidak didukung. Silakan pilih 'jpg', 'jpeg', 'png', 'pdf', atau 'array'."
+            return output
+
+        if data[:4].tobytes() == b'%PDF':
+            if output_format == 'pdf' and pdf_mode == 'vector' and position_str not in ('auto', 'luar gambar'):
+                # Mode vektor: PDF dibaca dan ditulis sepenuhnya di memori
+                buffer = io.BytesIO()
+                with measure_stage(metrics, 'pdf_vector', bytes_in=len(data)):
+                    add_watermark_to_pdf_vector(
+                        data, buffer, watermark_type, position_str, opacity, text=text, font_type=font_type,
+                        font_color=font_color, logo_image=logo_image, scale_factor=scale_factor, thickness=thickness, logo_key=logo_key
+                    )
+                output[0] = buffer.getvalue()
+                return output
+
+            page_options['watermark_type'] = watermark_type
+            pages = iter_watermarked_pdf_pages(data, page_options, page_window=pdf_page_window, workers=pdf_workers, metrics=metrics)
+            if output_format == 'pdf':
+                buffer = io.BytesIO()
+                with StreamingPdfWriter(buffer) as pdf_writer:
+                    add_page = measured(metrics, 'encode', pdf_writer.add_page)
+                    for _, image_with_watermark in pages:
+                        add_page(image_with_watermark, resolution=300)
+                output[0] = buffer.getvalue()
+            else:
+                encode = measured(metrics, 'encode', encode_image)
+                output[0] = [page if output_format == 'array' else encode(page, output_format) for _, page in pages]
+            return output
+
+        with measure_stage(metrics, 'decode', bytes_in=len(data)) as stage:
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            stage['bytes_out'] = image.nbytes if image is not None else 0
+        if image is None:
+            output[1] = "Error While Embedding Watermark: Gambar tidak dapat di-decode"
+            return output
+
+        image_with_watermark = watermark_image_array(image, watermark_type, metrics=metrics, **page_options)
+        if image_with_watermark is None or image_with_watermark.size == 0:
+            output[1] = "Error: Gambar hasil watermarking kosong."
+            return output
+
+        if output_format == 'array':
+            output[0] = image_with_watermark
+        else:
+            with measure_stage(metrics, 'encode') as stage:
+                output[0] = encode_image(image_with_watermark, output_format)
+                stage['bytes_out'] = len(output[0])
+        return output
+
+    except Exception as e:
+        output[1] = f"Error While Embedding Watermark: {str(e)}"
+        return output
+
+def read_source_image(source):
+    """Men-decode gambar sumber (BGR) dari path, isi file (bytes, bytearray, memoryview) atau objek file biner."""
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.imread(os.fspath(source))
+    data = source.read() if hasattr(source, 'read') else source
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def render_image_variant(image, variant, saliency_max_side=512, saliency_map=None):
+    """Membuat satu varian dari gambar yang sudah di-decode dan di-enhance; mengembalikan [output, error_message].
+
+    variant berisi opsi watermark seperti process_multiple_files (watermark_type, text, font_type, font_color,
+    logo_path/logo_image, position_str, opacity, scale_factor, thickness, bar_height) ditambah output_format
+    ('png', 'jpg'/'jpeg' atau 'array'), max_side opsional (sisi terpanjang gambar varian, misalnya untuk preview)
+    dan output_path opsional (hasil ditulis ke file dan path-nya dikembalikan, bukan bytes).
+    """
+    output = [None, '']
+    try:
+        options = dict(variant)
+        watermark_type = options.pop('watermark_type', None)
+        output_format = (options.pop('output_format', None) or 'png').lower()
+        output_path = options.pop('output_path', None)
+        max_side = options.pop('max_side', None)
+
+        if watermark_type == 'logo':
+            options['logo_image'], options['logo_key'], output[1] = resolve_logo(
+                options.pop('logo_path', None), options.get('logo_image'), options.get('logo_key'))
+            if output[1]:
+                return output
+        elif watermark_type == 'text':
+            options['font_color'] = get_color_from_string(options.get('font_color', (255, 255, 255)))
+            if options.get('text') is None:
+                output[1] = "Error While Embedding Watermark: Text harus disediakan untuk watermark jenis teks."
+                return output
+
+        # Setiap varian bekerja pada salinannya sendiri (watermark ditempel in place)
+        if max_side and max(image.shape[:2]) > max_side:
+            scale = max_side / max(image.shape[:2])
+            variant_image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            variant_image = image.copy()
+
+        image_with_watermark = watermark_image_array(
+            variant_image, watermark_type, saliency_max_side=saliency_max_side, saliency_map=saliency_map, **options
+        )
+        if image_with_watermark is None or image_with_watermark.size == 0:
+            output[1] = "Error: Gambar hasil watermarking kosong."
+            return output
+
+        if output_format == 'array':
+            output[0] = image_with_watermark
+        elif output_path is not None:
+            with open(output_path, 'wb') as output_file:
+                output_file.write(encode_image(image_with_watermark, output_format))
+            output[0] = os.path.abspath(output_path)
+        else:
+            output[0] = encode_image(image_with_watermark, output_format)
+        return output
+
+    except Exception as e:
+        output[1] = f"Error While Embedding Watermark: {str(e)}"
+        return output
+
+def process_image_variants(source, variants, enchance_quality=None, saliency_max_side=512, workers=None, denoise_scale=1.0):
+    """Membuat beberapa varian watermark dari satu gambar sumber ("fan-out").
+
+    Gambar di-decode sekali dan di-enhance sekali per profil: enchance_quality (dan denoise_scale) berlaku untuk
+    semua varian, kecuali varian yang memberikan enchance_quality/denoise_scale sendiri; profil varian tersebut
+    diterapkan ke hasil decode yang belum di-enhance, jadi tidak ada varian yang di-enhance dua kali. Peta
+    saliency untuk varian 'auto' dihitung sekali per gambar dasar dan dipakai bersama (juga oleh varian preview
+    dengan max_side lebih kecil), lalu semua varian dibuat paralel di thread pool. source berupa path, bytes atau
+    objek file biner; variants berupa list dict opsi (lihat render_image_variant). Mengembalikan list
+    [output, error_message] sesuai urutan variants.
+    """
+    variants = list(variants)
+    try:
+        source_image = read_source_image(source)
+        if source_image is None:
+            return [[None, "Error While Embedding Watermark: Gambar tidak dapat dibuka"] for _ in variants]
+    except Exception as e:
+        return [[None, f"Error While Embedding Watermark: {str(e)}"] for _ in variants]
+
+    bases = {}  # (profil, denoise_scale) -> [gambar dasar, peta saliency atau None]
+
+    def prepare(variant):
+        """(gambar dasar, peta saliency, opsi varian tanpa opsi enhancement) untuk satu varian."""
+        options = dict(variant)
+        profile = get_enhancement_profile(options.pop('enchance_quality', enchance_quality))
+        scale = options.pop('denoise_scale', denoise_scale)
+        base = bases.get((profile, scale))
+        if base is None:
+            image = preprocess_image(source_image, profile=profile, denoise_scale=scale) if profile != 'off' else source_image
+            base = bases[(profile, scale)] = [image, None]
+        if options.get('position_str') == 'auto' and base[1] is None:
+            base[1] = get_saliency_map(base[0], saliency_max_side)
+        return base[0], base[1], options
+
+    # Gambar dasar dan peta saliency disiapkan berurutan agar setiap profil hanya dihitung sekali
+    jobs = []
+    for variant in variants:
+        try:
+            jobs.append(prepare(variant))
+        except Exception as e:
+            jobs.append(f"Error While Embedding Watermark: {str(e)}")
+
+    def render(job):
+        if isinstance(job, str):
+            return [None, job]
+        image, saliency_map, options = job
+        return render_image_variant(image, options, saliency_max_side, saliency_map)
+
+    workers = workers or min(len(variants), os.cpu_count() or 1)
+    if workers <= 1 or len(variants) <= 1:
+        return [render(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render, jobs))
@@ -0,0 +1,72 @@
+import threading
+import time
+
+class JobCancelled(Exception):
+    """Dilempar di dalam loop frame saat job dibatalkan lewat CancelToken."""
+
+class CancelToken:
+    """Token pembatalan kooperatif: cancel() dari thread mana pun, loop frame memeriksa is_cancelled()."""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    def is_cancelled(self):
+        return self.event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.event.is_set():
+            raise JobCancelled("Proses dibatalkan")
+
+class ProgressReporter:
+    """Menghitung progres job video dan memanggil callback(progress) paling sering setiap interval detik.
+
+    progress berisi job, state ('running', 'done', 'cancelled', 'error'), frames_done, total_frames
+    (CAP_PROP_FRAME_COUNT, None jika tidak diketahui), percent, fps (kecepatan sejak laporan sebelumnya),
+    average_fps, elapsed dan eta (detik, dari fps saat ini; None jika belum bisa diperkirakan).
+    """
+
+    def __init__(self, callback, total_frames=None, interval=0.5, job=None):
+        self.callback = callback
+        self.total_frames = total_frames if total_frames and total_frames > 0 else None
+        self.interval = interval
+        self.job = job
+        self.frames_done = 0
+        self.fps = 0.0
+        self.started_at = self.reported_at = time.perf_counter()
+        self.reported_frames = 0
+
+    def update(self, frames_done):
+        """Mencatat jumlah frame selesai; callback hanya dipanggil jika interval sudah lewat."""
+        self.frames_done = frames_done
+        now = time.perf_counter()
+        if now - self.reported_at >= self.interval:
+            self.report('running', now)
+
+    def report(self, state, now=None):
+        now = now if now is not None else time.perf_counter()
+        window = now - self.reported_at
+        if window > 0 and self.frames_done > self.reported_frames:
+            self.fps = (self.frames_done - self.reported_frames) / window
+        self.reported_at, self.reported_frames = now, self.frames_done
+
+        elapsed = now - self.started_at
+        total = self.total_frames
+        eta = None
+        if state == 'done':
+            eta = 0.0
+        elif state == 'running' and total and self.fps > 0:
+            eta = max(total - self.frames_done, 0) / self.fps
+
+        self.callback({
+            'job': self.job, 'state': state, 'frames_done': self.frames_done, 'total_frames': total,
+            'percent': min(self.frames_done / total * 100, 100.0) if total else None,
+            'fps': self.fps, 'average_fps': self.frames_done / elapsed if elapsed > 0 else 0.0,
+            'elapsed': elapsed, 'eta': eta,
+        })
+
+    def finish(self, state='done'):
+        """Laporan terakhir (selalu dipanggil) dengan state akhir job."""
+        self.report(state)
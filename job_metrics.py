@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Counter per tahap yang dijumlahkan di summary
+STAGE_COUNTERS = ('bytes_in', 'bytes_out', 'frames')
+
+class JobMetrics:
+    """Pengukuran per tahap (opt-in) untuk job watermark: decode, crop, enhance, saliency, composite, encode, dst.
+
+    Setiap tahap dicatat sebagai record dict: job (path file), stage, seconds (wall time), calls, dan jika
+    diketahui bytes_in, bytes_out dan frames. Record dikirim ke callback(record) begitu tahap selesai dan
+    disimpan di records; summary() menjumlahkannya per job dan tahap. Tahap 'total' ditulis di akhir setiap
+    job berisi waktu total, error_message, cache_hit dan peak_bytes (puncak memori yang dialokasikan selama
+    job menurut tracemalloc, termasuk array numpy; hanya jika trace_memory=True). Aman dipakai dari beberapa
+    thread; job yang berjalan bersamaan saling mempengaruhi peak_bytes.
+    """
+
+    def __init__(self, callback=None, trace_memory=False, job=None):
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.job = job
+        self.records = []
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.started_tracing = False
+
+    def for_job(self, job):
+        """JobMetrics untuk satu job (file) yang menulis ke records dan callback yang sama."""
+        child = JobMetrics(self.callback, self.trace_memory, job)
+        child.records, child.lock = self.records, self.lock
+        return child
+
+    def add(self, stage, seconds, calls=1, **counters):
+        """Mencatat satu tahap (atau total beberapa pemanggilan tahap yang sama) dan mengirimnya ke callback."""
+        record = {'job': self.job, 'stage': stage, 'seconds': seconds, 'calls': calls}
+        record.update((name, value) for name, value in counters.items() if value is not None)
+        self.extend([record])
+        return record
+
+    def extend(self, records):
+        """Menambahkan record yang sudah jadi (misalnya dari proses worker) dan mengirimnya ke callback."""
+        with self.lock:
+            self.records.extend(records)
+        if self.callback is not None:
+            for record in records:
+                self.callback(record)
+
+    @contextmanager
+    def stage(self, stage, **counters):
+        """Context manager yang mengukur wall time tahap; counter bisa diisi lewat dict yang di-yield."""
+        record = dict(counters)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(stage, time.perf_counter() - start, **record)
+
+    def frame_timer(self):
+        """StageTotals untuk loop per frame yang dicatat ke metrics ini."""
+        return StageTotals(self)
+
+    def begin(self):
+        """Menandai awal job (dan mulai mengukur puncak memori jika trace_memory)."""
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+        self.started_at = time.perf_counter()
+
+    def end(self, result=None, **counters):
+        """Menulis tahap 'total' untuk job ini dari hasil [output, error_message]."""
+        if result is not None:
+            counters['error_message'] = result[1]
+        if self.trace_memory and tracemalloc.is_tracing():
+            counters['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            if self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+        return self.add('total', time.perf_counter() - self.started_at, **counters)
+
+    def summary(self):
+        """Ringkasan per job: {job: {stage: {seconds, calls, bytes_in, bytes_out, frames, ...}}}."""
+        with self.lock:
+            records = list(self.records)
+
+        jobs = {}
+        for record in records:
+            stages = jobs.setdefault(record['job'], {})
+            entry = stages.setdefault(record['stage'], {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += record['seconds']
+            entry['calls'] += record['calls']
+            for name, value in record.items():
+                if name in ('job', 'stage', 'seconds', 'calls'):
+                    continue
+                entry[name] = entry.get(name, 0) + value if name in STAGE_COUNTERS else value
+        return jobs
+
+class StageTotals:
+    """Akumulator waktu per tahap untuk loop per frame video: dicatat ke metrics sekali (flush), bukan per frame.
+
+    wrap(stage, function) mengembalikan function yang waktu setiap pemanggilannya dijumlahkan ke tahap stage.
+    Aman dipanggil dari beberapa thread (misalnya worker pipeline frame).
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.totals = {}  # stage -> [seconds, calls]
+        self.lock = threading.Lock()
+
+    def wrap(self, stage, function):
+        totals = self.totals.setdefault(stage, [0.0, 0])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    totals[0] += elapsed
+                    totals[1] += 1
+        return timed
+
+    def flush(self):
+        """Mencatat total setiap tahap ke metrics (calls = jumlah pemanggilan) lalu mengosongkannya."""
+        with self.lock:
+            totals = [(stage, seconds, calls) for stage, (seconds, calls) in self.totals.items() if calls]
+            for entry in self.totals.values():
+                entry[:] = [0.0, 0]
+        for stage, seconds, calls in totals:
+            self.metrics.add(stage, seconds, calls=calls)
+
+def timed(timer, stage, function):
+    """timer.wrap(stage, function) jika timer (StageTotals) diberikan; tanpa timer function apa adanya."""
+    return function if timer is None else timer.wrap(stage, function)
+
+@contextmanager
+def measure_stage(metrics, stage, **counters):
+    """metrics.stage(...) jika metrics diberikan; tanpa metrics hanya meng-yield dict counter kosong."""
+    if metrics is None:
+        yield {}
+        return
+    with metrics.stage(stage, **counters) as record:
+        yield record
+
+def measure_iter(metrics, stage, iterable):
+    """Meneruskan item dari iterable; waktu mengambil setiap item dicatat sebagai satu pemanggilan tahap stage."""
+    if metrics is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        metrics.add(stage, time.perf_counter() - start)
+        yield item
+
+def measured(metrics, stage, function):
+    """function yang setiap pemanggilannya dicatat sebagai tahap stage; tanpa metrics function apa adanya."""
+    if metrics is None:
+        return function
+
+    def wrapper(*args, **kwargs):
+        with metrics.stage(stage):
+            return function(*args, **kwargs)
+    return wrapper
+
+def log_metrics(logger=None, level=logging.INFO):
+    """Callback JobMetrics yang menulis setiap record sebagai satu baris log."""
+    logger = logger or logging.getLogger('watermark.metrics')
+
+    def callback(record):
+        details = ' '.join(f"{name}={value}" for name, value in record.items() if name not in ('job', 'stage', 'seconds'))
+        logger.log(level, "%s %s %.2f ms %s", record['job'], record['stage'], record['seconds'] * 1000, details)
+    return callback
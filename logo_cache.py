@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+class LogoCache:
+    """Cache LRU satu proses untuk logo (hasil decode dan sprite RGBA yang sudah diproses), dibatasi total byte.
+
+    Nilai yang disimpan berupa array numpy (atau tuple berisi array) dan dijadikan read-only, karena
+    dipakai bersama oleh semua pemanggil. Aman dipakai dari beberapa thread sekaligus.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, ukuran byte), urutan dari yang paling lama tidak dipakai
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Mengembalikan nilai untuk key (dan menandainya baru dipakai), atau None jika tidak ada."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Menyimpan value lalu membuang entry yang paling lama tidak dipakai sampai total byte di bawah batas."""
+        size = sum(item.nbytes for item in value if hasattr(item, 'nbytes')) if isinstance(value, tuple) else value.nbytes
+        if size > self.max_bytes:
+            return value  # Terlalu besar untuk disimpan
+
+        for item in (value if isinstance(value, tuple) else (value,)):
+            if hasattr(item, 'flags'):
+                item.flags.writeable = False
+
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self.current_bytes -= self.entries.popitem(last=False)[1][1]
+        return value
+
+    def get_or_create(self, key, create):
+        """Mengembalikan nilai dari cache, atau memanggil create() dan menyimpan hasilnya (None tidak disimpan)."""
+        value = self.get(key)
+        if value is None:
+            value = create()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def stats(self):
+        """Statistik cache: hits, misses, jumlah entry dan total byte."""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                    'bytes': self.current_bytes, 'max_bytes': self.max_bytes}
+
+    def clear(self):
+        """Mengosongkan cache dan mereset counter."""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+# Cache bersama untuk seluruh proses (setiap proses worker memiliki cache sendiri)
+logo_cache = LogoCache()
+
+def logo_file_key(logo_path):
+    """Key versi file logo: path absolut, waktu modifikasi dan ukuran (file yang diubah mendapat key baru)."""
+    stat = os.stat(logo_path)
+    return (os.path.abspath(logo_path), stat.st_mtime_ns, stat.st_size)
+
+def logo_content_key(logo):
+    """Hash isi logo yang sudah di-decode (bentuk, tipe data dan piksel)."""
+    digest = hashlib.blake2b(f"{logo.shape}{logo.dtype}".encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(logo))
+    return digest.hexdigest()
+
+def normalize_logo(logo):
+    """Menyamakan format logo hasil decode: grayscale (1 channel) diubah ke BGR, BGR/BGRA dibiarkan."""
+    if logo is None or logo.size == 0:
+        return None
+    if logo.ndim == 2 or logo.shape[2] == 1:
+        return cv2.cvtColor(logo, cv2.COLOR_GRAY2BGR)
+    return logo
+
+def decode_logo(data):
+    """Men-decode isi file logo (bytes) di memori dengan cv2.imdecode. Mengembalikan None jika gagal."""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    # JPEG tidak punya alpha: decode berwarna agar orientasi EXIF tetap diterapkan seperti cv2.imread
+    flags = cv2.IMREAD_COLOR if buffer[:2].tobytes() == b'\xff\xd8' else cv2.IMREAD_UNCHANGED
+    return normalize_logo(cv2.imdecode(buffer, flags))
+
+def read_logo_bytes(logo_source):
+    """Mengambil isi file logo dari path (str/PathLike), objek file biner, atau bytes/bytearray/memoryview."""
+    if isinstance(logo_source, (str, os.PathLike)):
+        with open(logo_source, 'rb') as logo_file:
+            return logo_file.read()
+    if hasattr(logo_source, 'read'):
+        return logo_source.read()
+    return logo_source
+
+def decode_logo_source(logo_source):
+    """Membaca logo tanpa cache dari path, bytes, objek file, atau array numpy. Mengembalikan None jika gagal.
+
+    Semua format di-decode di memori; tidak ada file sementara yang ditulis.
+    """
+    if isinstance(logo_source, np.ndarray):
+        return normalize_logo(logo_source)
+    try:
+        return decode_logo(read_logo_bytes(logo_source))
+    except (OSError, TypeError, ValueError):
+        return None
+
+def load_logo_entry(logo_source):
+    """Membaca logo lewat cache proses dari path, bytes, objek file, atau array numpy.
+
+    Path di-cache per versi file (path, mtime, ukuran) dan bytes per hash isinya. Mengembalikan
+    (logo, logo_key) dengan logo_key hash isi logo untuk cache sprite, atau (None, None) jika gagal.
+    """
+    if isinstance(logo_source, np.ndarray):
+        logo = normalize_logo(logo_source)
+        return (None, None) if logo is None else (logo, logo_content_key(logo))
+
+    try:
+        if isinstance(logo_source, (str, os.PathLike)):
+            key = ('file', logo_file_key(logo_source))
+            data = None  # File hanya dibaca jika belum ada di cache
+        else:
+            data = read_logo_bytes(logo_source)
+            key = ('bytes', hashlib.blake2b(data, digest_size=16).hexdigest())
+    except (OSError, TypeError, ValueError):
+        return None, None
+
+    def decode_entry():
+        try:
+            logo = decode_logo(read_logo_bytes(logo_source) if data is None else data)
+        except (OSError, ValueError):
+            return None
+        return None if logo is None else (logo, logo_content_key(logo))
+
+    entry = logo_cache.get_or_create(key, decode_entry)
+    return (None, None) if entry is None else entry
+
+def describe_logo_source(logo_source):
+    """Nama logo untuk pesan error: path-nya, atau jenis sumbernya jika logo bukan file."""
+    if isinstance(logo_source, (str, os.PathLike)):
+        return os.fspath(logo_source)
+    return f"<{type(logo_source).__name__}>"
+
+def get_logo_cache_stats():
+    """Statistik cache logo proses ini (hits, misses, entries, bytes, max_bytes)."""
+    return logo_cache.stats()
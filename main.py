@@ -1,18 +1,25 @@
+from image_watermark_choice import process_image_bytes, process_image_variants
 from watermark_handler import run_watermark_handler
 
-def watermark_image(file_path,          # Content File Path (String)
-                    logo_path=None,     # Watermark File Path (String)
+def watermark_image(file_path,          # Content File Path (String) or list of paths (batch)
+                    logo_path=None,     # Watermark Logo: File Path (String), bytes, binary file object or numpy array
                     text=None,          # Watermark Text (String)
                     font_type=None,     # Watermak Text Font (String)
                     font_color=None,    # Watermark Text Color (String)
                     position_str=None,  # Watermark Position (String)
                     opacity=None,       # Watermark Opacity (Float)
                     output_format=None, # Output Format (String)
-                    enchance_quality=None, # Enchance Quality (Boolean)
-                    watermark_type=None):
+                    enchance_quality=None, # Enchance Quality (Boolean or profile: 'off', 'fast', 'balanced', 'quality')
+                    watermark_type=None,
+                    workers=None,       # Batch Worker Processes (Integer, default CPU count)
+                    pdf_mode='raster',  # PDF Mode: 'raster' or 'vector' (String)
+                    pdf_workers=1,      # PDF Page Worker Processes (Integer, raster mode)
+                    cache_dir=None,     # Result Cache Folder (String, None = no cache)
+                    metrics=None,       # Per-Stage Timing (job_metrics.JobMetrics, None = off)
+                    denoise_scale=None): # 'balanced' Denoise Luma Scale (Float < 1 = faster, None = full resolution)
     """Menambahkan watermark ke gambar berdasarkan tipe yang dipilih."""
     
-    if not logo_path:  # Jika logo_path kosong atau None
+    if logo_path is None or (isinstance(logo_path, str) and not logo_path):  # Jika logo_path kosong atau None
         # Untuk watermark teks
         result = run_watermark_handler(
             file_paths=file_path,
@@ -23,6 +30,12 @@ def watermark_image(file_path,          # Content File Path (String)
             opacity=opacity,
             output_format=output_format,
             enchance_quality=enchance_quality,
+            workers=workers,
+            cache_dir=cache_dir,
+            metrics=metrics,
+            pdf_mode=pdf_mode,
+            pdf_workers=pdf_workers,
+            denoise_scale=denoise_scale,
             watermark_type='text'
         )
         #print('watermark text', result)
@@ -37,25 +50,36 @@ def watermark_image(file_path,          # Content File Path (String)
             opacity=opacity,
             output_format=output_format,
             enchance_quality=enchance_quality,
+            workers=workers,
+            cache_dir=cache_dir,
+            metrics=metrics,
+            pdf_mode=pdf_mode,
+            pdf_workers=pdf_workers,
+            denoise_scale=denoise_scale,
             watermark_type='logo'
         )
         #print('watermark logo', result)
         return result
     
 
-def watermark_video(file_path,              # Content File Path (String)
-                    logo_path=None,         # Watermark File Path (String)
+def watermark_video(file_path,              # Content File Path (String) or list of paths (batch)
+                    logo_path=None,         # Watermark Logo: File Path (String), bytes, binary file object or numpy array
                     text=None,              # Watermark Text (String)
                     font_type=None,         # Watermark Text Font (String)
                     font_color=None,        # Watermark Font Color (String)
                     position_str=None,      # Watermark Position (String)
                     opacity=None,           # Watermark Opacity (Float)
                     output_format=None,     # Output Format (String)
-                    enchance_quality=None,  # Enhchance Quality (Boolean)
-                    watermark_type=None): 
+                    enchance_quality=None,  # Enhchance Quality (Boolean or profile: 'off', 'fast', 'balanced', 'quality')
+                    watermark_type=None,
+                    workers=None,           # Batch Worker Processes (Integer, default CPU count)
+                    cache_dir=None,         # Result Cache Folder (String, None = no cache)
+                    metrics=None,           # Per-Stage Timing (job_metrics.JobMetrics, None = off)
+                    progress_callback=None, # Progress Callback (Callable(dict): frames, fps, ETA; None = off)
+                    cancel_token=None):     # Cancellation (job_control.CancelToken, None = off)
     """Menambahkan watermark ke video berdasarkan tipe yang dipilih."""
     
-    if not logo_path:  # Jika logo_path kosong atau None
+    if logo_path is None or (isinstance(logo_path, str) and not logo_path):  # Jika logo_path kosong atau None
         # Untuk watermark teks
         result = run_watermark_handler(
             file_paths=file_path,
@@ -66,6 +90,11 @@ def watermark_video(file_path,              # Content File Path (String)
             opacity=opacity,
             output_format=output_format,
             enchance_quality=enchance_quality,
+            workers=workers,
+            cache_dir=cache_dir,
+            metrics=metrics,
+            progress_callback=progress_callback,
+            cancel_token=cancel_token,
             watermark_type='text'
         )
         #print('watermark text', result)
@@ -80,11 +109,56 @@ def watermark_video(file_path,              # Content File Path (String)
             opacity=opacity,
             output_format=output_format,
             enchance_quality=enchance_quality,
+            workers=workers,
+            cache_dir=cache_dir,
+            metrics=metrics,
+            progress_callback=progress_callback,
+            cancel_token=cancel_token,
             watermark_type='logo'
         )
         #print('watermark logo', result)
         return result
 
+def watermark_image_bytes(data,               # Image/PDF Content (bytes or binary file object)
+                          logo_path=None,     # Watermark Logo: File Path (String), bytes, binary file object or numpy array
+                          text=None,          # Watermark Text (String)
+                          font_type=None,     # Watermak Text Font (String)
+                          font_color=None,    # Watermark Text Color (String)
+                          position_str=None,  # Watermark Position (String)
+                          opacity=None,       # Watermark Opacity (Float)
+                          output_format='png', # Output Format: 'png', 'jpg', 'pdf' (PDF input) or 'array' (numpy BGR)
+                          enchance_quality=None, # Enchance Quality (Boolean or profile: 'off', 'fast', 'balanced', 'quality')
+                          pdf_mode='raster',  # PDF Mode: 'raster' or 'vector' (String)
+                          pdf_workers=1,      # PDF Page Worker Processes (Integer, raster mode)
+                          metrics=None,       # Per-Stage Timing (job_metrics.JobMetrics, None = off)
+                          denoise_scale=1.0): # 'balanced' Denoise Luma Scale (Float < 1 = faster)
+    """Menambahkan watermark ke gambar/PDF di memori; mengembalikan [output, error_message] tanpa menulis file."""
+    is_logo = logo_path is not None and not (isinstance(logo_path, str) and not logo_path)
+    return process_image_bytes(
+        data,
+        watermark_type='logo' if is_logo else 'text',
+        logo_path=logo_path if is_logo else None,
+        text=text,
+        font_type=font_type,
+        font_color=font_color,
+        position_str=position_str,
+        opacity=opacity,
+        output_format=output_format,
+        enchance_quality=enchance_quality,
+        pdf_mode=pdf_mode,
+        pdf_workers=pdf_workers,
+        metrics=metrics,
+        denoise_scale=denoise_scale
+    )
+
+def watermark_image_variants(file_path,        # Content File Path (String), bytes or binary file object
+                             variants,         # List of dicts: watermark options + output_format, max_side, output_path
+                             enchance_quality=None, # Enchance Quality (Boolean or profile), applied once; a variant may override it
+                             workers=None,     # Variant Worker Threads (Integer, default CPU count)
+                             denoise_scale=1.0): # 'balanced' Denoise Luma Scale (Float < 1 = faster)
+    """Membuat beberapa varian watermark dari satu gambar yang di-decode dan di-enhance sekali saja."""
+    return process_image_variants(file_path, variants, enchance_quality=enchance_quality, workers=workers, denoise_scale=denoise_scale)
+
 #file_paths = 'Gambar\\Content File.png'
 #file_paths = "Gambar\komputer mainframe1.jpg"
 #file_paths = 'Gambar\shopping after.jpg'
@@ -0,0 +1,127 @@
+import io
+import zlib
+
+import cv2
+import numpy as np
+
+class StreamingPdfWriter:
+    """Menulis PDF berisi halaman gambar secara streaming: setiap halaman langsung ditulis ke file.
+
+    Tidak ada halaman yang disimpan di memori dan tidak ada bagian file yang ditulis ulang, sehingga
+    biaya penulisan linear terhadap jumlah halaman. Hanya offset objek yang disimpan untuk tabel xref
+    yang ditulis sekali saat close(). Halaman disimpan sebagai JPEG (DCTDecode), sama seperti Pillow.
+    """
+
+    def __init__(self, path, jpeg_quality=75):
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        # path boleh berupa path file atau objek file biner (misalnya io.BytesIO)
+        self.owns_file = not hasattr(path, 'write')
+        self.file = open(path, 'wb') if self.owns_file else path
+        self.closed = False
+        self.offsets = {}    # Nomor objek -> posisi byte di file
+        self.page_refs = []  # Nomor objek halaman, urut sesuai penambahan
+        self.next_object = 3  # 1 = Catalog, 2 = Pages (ditulis saat close)
+        self.file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_object(self, number, body, stream=None):
+        """Menulis satu objek PDF (opsional dengan stream) dan mencatat offset-nya."""
+        self.offsets[number] = self.file.tell()
+        self.file.write(f'{number} 0 obj\n'.encode() + body)
+        if stream is not None:
+            self.file.write(b'\nstream\n' + stream + b'\nendstream')
+        self.file.write(b'\nendobj\n')
+
+    def add_page(self, image, resolution=300):
+        """Menambahkan gambar BGR (OpenCV) sebagai satu halaman; ukuran halaman mengikuti resolution (dpi)."""
+        ok, jpeg = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise ValueError("Halaman tidak dapat di-encode ke JPEG.")
+
+        height, width = image.shape[:2]
+        page_w = width * 72.0 / resolution  # Ukuran halaman dalam point (1/72 inch)
+        page_h = height * 72.0 / resolution
+        image_ref, content_ref, page_ref = self.next_object, self.next_object + 1, self.next_object + 2
+        self.next_object += 3
+
+        jpeg = jpeg.tobytes()
+        self._write_object(image_ref, (
+            f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB '
+            f'/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>').encode(), jpeg)
+
+        content = f'q {page_w:.4f} 0 0 {page_h:.4f} 0 0 cm /Im0 Do Q'.encode()
+        self._write_object(content_ref, f'<< /Length {len(content)} >>'.encode(), content)
+
+        self._write_object(page_ref, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] '
+            f'/Resources << /XObject << /Im0 {image_ref} 0 R >> >> /Contents {content_ref} 0 R >>').encode())
+        self.page_refs.append(page_ref)
+
+    def add_sprite_page(self, sprite, position, image_size, page_size, opacity=1.0):
+        """Menambahkan halaman transparan berisi sprite BGRA, untuk dijadikan overlay di atas halaman PDF lain.
+
+        position dan ukuran sprite dalam piksel relatif terhadap image_size (h, w) yang dipetakan ke
+        seluruh page_size (lebar, tinggi dalam point). Warna dan alpha (dikali opacity) disimpan lossless
+        (FlateDecode) dengan alpha sebagai SMask; bagian sprite di luar halaman otomatis terpotong.
+        """
+        sprite_h, sprite_w = sprite.shape[:2]
+        page_w, page_h = page_size
+        scale_x, scale_y = page_w / image_size[1], page_h / image_size[0]
+
+        # Koordinat PDF dimulai dari kiri bawah, sedangkan koordinat gambar dari kiri atas
+        x_pt = position[0] * scale_x
+        y_pt = page_h - (position[1] + sprite_h) * scale_y
+        w_pt, h_pt = sprite_w * scale_x, sprite_h * scale_y
+
+        color = zlib.compress(np.ascontiguousarray(sprite[:, :, 2::-1]).tobytes())  # BGR -> RGB
+        alpha = sprite[:, :, 3] if sprite.shape[2] == 4 else np.full((sprite_h, sprite_w), 255, dtype=np.uint8)
+        alpha = zlib.compress(np.rint(alpha * opacity).astype(np.uint8).tobytes())
+
+        mask_ref, image_ref, content_ref, page_ref = range(self.next_object, self.next_object + 4)
+        self.next_object += 4
+
+        self._write_object(mask_ref, (
+            f'<< /Type /XObject /Subtype /Image /Width {sprite_w} /Height {sprite_h} /ColorSpace /DeviceGray '
+            f'/BitsPerComponent 8 /Filter /FlateDecode /Length {len(alpha)} >>').encode(), alpha)
+        self._write_object(image_ref, (
+            f'<< /Type /XObject /Subtype /Image /Width {sprite_w} /Height {sprite_h} /ColorSpace /DeviceRGB '
+            f'/BitsPerComponent 8 /Filter /FlateDecode /SMask {mask_ref} 0 R /Length {len(color)} >>').encode(), color)
+
+        content = f'q {w_pt:.4f} 0 0 {h_pt:.4f} {x_pt:.4f} {y_pt:.4f} cm /Wm0 Do Q'.encode()
+        self._write_object(content_ref, f'<< /Length {len(content)} >>'.encode(), content)
+
+        self._write_object(page_ref, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] '
+            f'/Resources << /XObject << /Wm0 {image_ref} 0 R >> >> /Contents {content_ref} 0 R >>').encode())
+        self.page_refs.append(page_ref)
+
+    def close(self):
+        """Menulis Catalog, Pages, tabel xref dan trailer lalu menutup file."""
+        if self.closed:
+            return
+        self.closed = True
+
+        kids = ' '.join(f'{ref} 0 R' for ref in self.page_refs)
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_refs)} >>'.encode())
+
+        xref_offset = self.file.tell()
+        self.file.write(f'xref\n0 {self.next_object}\n0000000000 65535 f \n'.encode())
+        for number in range(1, self.next_object):
+            self.file.write(f'{self.offsets[number]:010d} 00000 n \n'.encode())
+        self.file.write(f'trailer\n<< /Size {self.next_object} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
+        if self.owns_file:
+            self.file.close()
+
+def build_sprite_overlay_pdf(sprite, position, image_size, page_size, opacity=1.0):
+    """Membuat PDF satu halaman (bytes) berisi sprite BGRA transparan untuk overlay watermark."""
+    buffer = io.BytesIO()
+    with StreamingPdfWriter(buffer) as writer:
+        writer.add_sprite_page(sprite, position, image_size, page_size, opacity)
+    return buffer.getvalue()
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from image_watermark_choice import get_color_from_string
+from logo_cache import load_logo_entry, logo_content_key
+
+# Naikkan jika perubahan kode membuat hasil lama tidak lagi sama dengan hasil baru
+CACHE_VERSION = 1
+
+# Saat cache penuh, entry lama dibuang sampai ukurannya turun ke bagian ini dari max_bytes agar put berikutnya
+# tidak langsung memicu scan folder lagi
+EVICT_TARGET = 0.9
+
+# Opsi yang hanya mempengaruhi kecepatan atau cara logo diberikan, bukan hasil; tidak ikut dalam key cache
+PERFORMANCE_OPTIONS = {
+    'workers', 'pdf_workers', 'pdf_page_window', 'pdf_write_workers', 'segment_workers',
+    'pipeline_workers', 'pipeline_queue_depth', 'logo_path', 'logo_image', 'logo_key', 'metrics',
+    'progress_callback', 'progress_interval', 'cancel_token'
+}
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Hash isi file (blake2b) yang dibaca per potongan agar file besar (video) tidak dimuat sekaligus."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def normalize_option(name, value):
+    """Menyamakan nilai opsi yang setara (misalnya 'Red' dan '#FF0000', True dan 'quality') untuk key cache."""
+    if name in ('enchance_quality', 'enhance_quality'):
+        if value is None or value is False:
+            return 'off'
+        return 'quality' if value is True else str(value).lower()
+    if name in ('output_format', 'position_str', 'pdf_mode') and isinstance(value, str):
+        return value.lower().strip()
+    if name == 'font_color' and value is not None:
+        try:
+            value = get_color_from_string(value)
+        except (ValueError, AttributeError):
+            pass
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return [normalize_option(None, item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return repr(value)
+
+def logo_fingerprint(options):
+    """Hash isi logo yang sudah di-decode (sama seperti logo_key di batch), atau None jika logo tidak bisa dibaca.
+
+    Logo dari logo_path dibaca lewat cache logo dan hasilnya disimpan ke options (logo_image, logo_key),
+    sehingga logo tidak di-decode dua kali dan objek file hanya dibaca sekali.
+    """
+    if options.get('logo_key') is not None:
+        return options['logo_key']
+    if options.get('logo_image') is not None:
+        options['logo_key'] = logo_content_key(options['logo_image'])
+        return options['logo_key']
+    if options.get('logo_path') is None:
+        return None
+
+    logo_image, logo_key = load_logo_entry(options['logo_path'])
+    if logo_image is not None:
+        options['logo_image'], options['logo_key'] = logo_image, logo_key
+    return logo_key
+
+def make_result_key(file_path, watermark_type, options):
+    """Key cache: hash isi file input, nama file input (menentukan nama output) dan opsi watermark yang dinormalisasi."""
+    payload = {
+        'version': CACHE_VERSION,
+        'input': hash_file(file_path),
+        'input_name': os.path.basename(file_path),
+        'watermark_type': watermark_type,
+        'logo': logo_fingerprint(options) if watermark_type == 'logo' else None,
+        'options': {name: normalize_option(name, value) for name, value in options.items() if name not in PERFORMANCE_OPTIONS},
+    }
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=20).hexdigest()
+
+class ResultCache:
+    """Cache hasil watermark di disk, dialamatkan dengan hash isi input + opsi (lihat make_result_key).
+
+    Setiap entry disimpan sebagai cache_dir/<2 huruf key>/<key>/<nama file output>. Entry ditulis ke file
+    sementara lalu di-os.replace (atomik), sehingga proses lain tidak pernah membaca file setengah jadi.
+    Waktu modifikasi file diperbarui saat dipakai, dan entry yang paling lama tidak dipakai dibuang
+    sampai total ukuran cache di bawah EVICT_TARGET x max_bytes (LRU).
+
+    Ukuran cache dihitung sekali (scan folder) lalu diperkirakan dari entry yang ditulis proses ini; folder
+    hanya di-scan ulang saat perkiraan melebihi max_bytes, sehingga put tidak bergantung pada jumlah entry.
+    Entry yang ditulis proses lain baru terhitung pada scan berikutnya.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.total_bytes = None  # Perkiraan ukuran cache; None = belum di-scan
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Path file hasil untuk key (dan menandainya baru dipakai), atau None jika tidak ada."""
+        try:
+            names = [name for name in os.listdir(self.entry_dir(key)) if not name.startswith('.tmp')]
+        except FileNotFoundError:
+            return None
+        if not names:
+            return None
+        path = os.path.join(self.entry_dir(key), names[0])
+        try:
+            os.utime(path)
+        except OSError:
+            return None  # Entry baru saja dibuang oleh proses lain
+        return path
+
+    def restore(self, cached_path):
+        """Menyalin file hasil dari cache ke path output biasa (nama file sama, di folder kerja) dan mengembalikan path-nya.
+
+        Disalin ke file sementara lalu di-os.replace, sehingga output selalu file baru milik pemanggil: entry
+        cache yang kemudian dibuang tidak memengaruhinya, dan output yang ditimpa proses lain tidak mengubah cache.
+        """
+        output_path = os.path.abspath(os.path.basename(cached_path))
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), prefix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(cached_path, temp_path)
+            os.replace(temp_path, output_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return output_path
+
+    def put(self, key, output_path):
+        """Menyalin file hasil ke cache secara atomik lalu membuang entry lama jika cache melebihi max_bytes."""
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self.scan())
+
+        entry_dir = self.entry_dir(key)
+        entry_path = os.path.join(entry_dir, os.path.basename(output_path))
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=entry_dir, prefix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, temp_path)
+            size = os.path.getsize(temp_path)
+            replaced = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+            os.replace(temp_path, entry_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.total_bytes += size - replaced
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def scan(self):
+        """Daftar (mtime, ukuran, path) semua entry di folder cache."""
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.startswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Membuang entry yang paling lama tidak dipakai sampai total ukuran cache tidak melebihi EVICT_TARGET x max_bytes."""
+        entries = self.scan()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TARGET:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Sudah dibuang proses lain atau tidak bisa dihapus; ukurannya tidak dikurangi
+            total -= size
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass  # Folder entry masih berisi file lain
+        self.total_bytes = total
+
+    def run(self, file_path, watermark_type, options, process):
+        """Mengembalikan hasil dari cache jika ada, atau menjalankan process(options) dan menyimpan hasilnya.
+
+        Jika ada di cache, file hasil disalin ke path output yang sama dengan pemrosesan biasa (lihat restore)
+        dan hasilnya [output_path, '']; jika entry dibuang saat disalin, file diproses ulang. Tanpa cache
+        hasilnya [output_path, error_message] seperti biasa. Hasil error dan PDF yang menghasilkan banyak
+        file gambar (satu per halaman) tidak di-cache.
+        """
+        options = dict(options)
+        output_format = str(options.get('output_format') or '').lower()
+        if file_path.lower().endswith('.pdf') and output_format != 'pdf':
+            return process(options)
+
+        try:
+            key = make_result_key(file_path, watermark_type, options)
+        except OSError:
+            return process(options)  # Input tidak bisa dibaca; biarkan pemrosesan biasa melaporkan error
+
+        cached_path = self.get(key)
+        if cached_path is not None:
+            try:
+                return [self.restore(cached_path), '']
+            except OSError:
+                pass  # Entry dibuang proses lain sebelum selesai disalin; proses ulang
+
+        result = process(options)
+        if not result[1] and isinstance(result[0], str) and os.path.isfile(result[0]):
+            try:
+                self.put(key, result[0])
+            except OSError:
+                pass  # Cache hanya optimasi; kegagalan menulis cache tidak menggagalkan hasil
+        return result
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from logo_cache import LogoCache
+
+# Tipe data sidecar .npy: float16 (presisi cukup untuk memilih posisi) atau uint8 (0..255, paling kecil)
+SIDECAR_DTYPES = ('float16', 'uint8')
+
+class SaliencyCache:
+    """Cache peta saliency per isi gambar dan resolusi kerja (max_side).
+
+    Key adalah hash SHA-1 piksel gambar kerja (sudah diperkecil ke max_side) beserta ukurannya, sehingga hashing
+    jauh lebih murah dari saliency itu sendiri dan gambar yang sama tidak dihitung ulang. Peta disimpan di memori
+    (LRU, dibatasi total byte) dan opsional sebagai sidecar .npy di sidecar_dir (float16 atau uint8) agar bisa
+    dipakai ulang antar proses/run. enabled=False mematikan cache (tanpa hashing) untuk gambar yang hanya diproses sekali.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, sidecar_dir=None, sidecar_dtype='float16', enabled=True):
+        self.memory = LogoCache(max_bytes)
+        self.sidecar_dir = None
+        self.sidecar_dtype = 'float16'
+        self.enabled = enabled
+        self.configure(sidecar_dir=sidecar_dir, sidecar_dtype=sidecar_dtype)
+
+    def configure(self, max_bytes=None, sidecar_dir=None, sidecar_dtype=None, enabled=None):
+        """Mengubah batas memori, folder sidecar (None = tanpa sidecar), tipe data sidecar dan enabled (None = tidak diubah)."""
+        if sidecar_dtype is not None and sidecar_dtype not in SIDECAR_DTYPES:
+            raise ValueError(f"Tipe sidecar saliency '{sidecar_dtype}' tidak dikenal. Pilih salah satu: {', '.join(SIDECAR_DTYPES)}.")
+        if max_bytes is not None:
+            self.memory.max_bytes = max_bytes
+        self.sidecar_dir = os.path.abspath(sidecar_dir) if sidecar_dir else None
+        if sidecar_dtype is not None:
+            self.sidecar_dtype = sidecar_dtype
+        if enabled is not None:
+            self.enabled = enabled
+        if self.sidecar_dir:
+            os.makedirs(self.sidecar_dir, exist_ok=True)
+
+    def key(self, working_image):
+        """Hash isi gambar kerja (SHA-1, cepat karena dipercepat hardware) beserta ukurannya."""
+        digest = hashlib.sha1(np.ascontiguousarray(working_image)).hexdigest()
+        return f"{digest}_{'x'.join(str(size) for size in working_image.shape)}"
+
+    def sidecar_path(self, key):
+        return os.path.join(self.sidecar_dir, f"{key}.npy")
+
+    def read_sidecar(self, key):
+        """Membaca peta dari sidecar .npy sebagai float32 0..1, atau None jika tidak ada/rusak."""
+        try:
+            stored = np.load(self.sidecar_path(key))
+        except (OSError, ValueError):
+            return None
+        if stored.dtype == np.uint8:
+            return stored.astype(np.float32) / 255.0
+        return stored.astype(np.float32)
+
+    def write_sidecar(self, key, saliency_map):
+        """Menulis sidecar secara atomik (file sementara lalu os.replace); kegagalan diabaikan."""
+        if self.sidecar_dtype == 'uint8':
+            stored = np.rint(np.clip(saliency_map, 0.0, 1.0) * 255.0).astype(np.uint8)
+        else:
+            stored = saliency_map.astype(np.float16)
+
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.sidecar_dir, prefix='.tmp', suffix='.npy')
+            with os.fdopen(fd, 'wb') as temp_file:
+                np.save(temp_file, stored)
+            os.replace(temp_path, self.sidecar_path(key))
+        except OSError:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get_or_compute(self, working_image, compute):
+        """Peta saliency gambar kerja dari memori, sidecar, atau compute(working_image).
+
+        Peta hanya bergantung pada gambar kerja, jadi gambar asli berbeda yang diperkecil menjadi gambar kerja
+        yang sama boleh berbagi peta.
+        """
+        if not self.enabled:
+            return compute(working_image)
+
+        key = self.key(working_image)
+        saliency_map = self.memory.get(key)
+        if saliency_map is not None:
+            return saliency_map
+
+        if self.sidecar_dir:
+            saliency_map = self.read_sidecar(key)
+        if saliency_map is None:
+            saliency_map = compute(working_image)
+            if self.sidecar_dir:
+                self.write_sidecar(key, saliency_map)
+        return self.memory.put(key, saliency_map)
+
+    def stats(self):
+        """Statistik cache memori (hits, misses, entries, bytes, max_bytes)."""
+        return self.memory.stats()
+
+    def clear(self):
+        """Mengosongkan cache memori (sidecar di disk tidak dihapus)."""
+        self.memory.clear()
+
+# Cache bersama untuk seluruh proses (setiap proses worker memiliki cache memori sendiri)
+saliency_cache = SaliencyCache()
+
+def configure_saliency_cache(max_bytes=None, sidecar_dir=None, sidecar_dtype=None, enabled=None):
+    """Mengatur cache saliency proses ini: batas memori, folder sidecar .npy dan tipe datanya, serta enabled."""
+    saliency_cache.configure(max_bytes=max_bytes, sidecar_dir=sidecar_dir, sidecar_dtype=sidecar_dtype, enabled=enabled)
+
+def get_saliency_cache_stats():
+    """Statistik cache saliency proses ini."""
+    return saliency_cache.stats()
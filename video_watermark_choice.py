@@ -1,7 +1,21 @@
 import cv2
+import multiprocessing
 import numpy as np
 import os
-from PIL import Image, ImageDraw, ImageFont
+import queue
+import threading
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from image_watermark_choice import calculate_saliency, get_enhancement_profile, window_saliency_sums
+from font_registry import build_text_sprite, render_ttf_text
+from job_control import JobCancelled, ProgressReporter
+from job_metrics import measure_stage, timed
+from logo_cache import describe_logo_source, load_logo_entry, logo_cache, logo_content_key
+from watermark_compositing import CompositeSprite, composite_sprite
 
 def get_color_from_string(color_str):
     """Mengambil warna RGB dari input string hex (#RRGGBB) atau nama warna ('red', 'green', 'blue')."""
@@ -18,6 +32,10 @@ def get_color_from_string(color_str):
         'magenta': (255, 0, 255)
     }
     
+    # Warna yang sudah berupa tuple BGR (misalnya sudah disiapkan sebelumnya) dipakai langsung
+    if isinstance(color_str, tuple):
+        return color_str
+
     # Ubah input menjadi huruf kecil untuk mencocokkan nama warna
     color_str = color_str.lower().strip()
 
@@ -70,6 +88,46 @@ def sharpen_frame(frame):
     kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]]) #Kernel ini adalah matriks 3x3 yang dirancang untuk menekankan detail dalam gambar. Elemen pusatnya (5) mengindikasikan bahwa nilai piksel di pusat harus lebih tinggi dari nilai piksel sekitarnya, sedangkan elemen lainnya (-1) mengindikasikan bahwa nilai piksel di sekitar pusat harus dikurangi, yang menghasilkan efek penajaman.
     return cv2.filter2D(frame, -1, kernel)
 
+def build_fused_enhancement_kernel():
+    """Mendekati denoise_frame (Gaussian 5x5) lalu sharpen_frame (3x3) dengan satu kernel separable 7 tap.
+
+    Ini aproksimasi: kernel gabungan 7x7 ber-rank 2 (nilai singular 0.53 dan 0.034), dan hanya vektor singular
+    terbesarnya yang dipakai (dinormalisasi agar kecerahan tidak berubah). Hasilnya sekitar 44 dB PSNR terhadap
+    dua filter terpisah, setara dengan kernel 7x7 eksak lewat satu filter2D (jalur dua langkah membulatkan dan
+    memotong nilai di antara blur dan sharpen), tetapi satu sepFilter2D sekitar 2x lebih cepat dari dua filter
+    terpisah sedangkan filter2D 7x7 eksak justru lebih lambat.
+    """
+    gaussian = cv2.getGaussianKernel(5, 0)
+    gaussian = gaussian @ gaussian.T
+    combined = np.zeros((7, 7))
+    for dy, dx, weight in ((0, 0, 5), (-1, 0, -1), (1, 0, -1), (0, -1, -1), (0, 1, -1)):
+        combined[1 + dy:6 + dy, 1 + dx:6 + dx] += weight * gaussian
+
+    vector = np.linalg.svd(combined)[0][:, 0]
+    return (vector / vector.sum()).astype(np.float32)
+
+FUSED_ENHANCEMENT_KERNEL = build_fused_enhancement_kernel()
+
+# Profil enhancement video (nama sama dengan profil gambar, diurai oleh get_enhancement_profile): (metode, enhance_every
+# default). Metode None = tanpa enhancement, 'fused' = satu kernel separable gabungan (aproksimasi), 'full' = denoise_frame
+# + sharpen_frame (perilaku lama). enhance_every = N hanya meng-enhance setiap frame ke-N; kwargs enhance_every menggantikan
+# nilai default ini.
+VIDEO_ENHANCEMENT_PROFILES = {
+    'off': (None, 1),
+    'fast': ('fused', 2),
+    'balanced': ('fused', 1),
+    'quality': ('full', 1),
+}
+
+def enhance_frame(frame, profile='quality'):
+    """Menerapkan enhancement (denoise + sharpen) ke frame sesuai profil."""
+    method = VIDEO_ENHANCEMENT_PROFILES[get_enhancement_profile(profile)][0]
+    if method == 'fused':
+        return cv2.sepFilter2D(frame, -1, FUSED_ENHANCEMENT_KERNEL, FUSED_ENHANCEMENT_KERNEL)
+    if method == 'full':
+        return sharpen_frame(denoise_frame(frame))
+    return frame
+
 def preprocess_logo_video(logo, scale_factor):
     """Melakukan preprocessing pada logo: mengubah ukuran, menghilangkan latar belakang."""
     logo_resized = cv2.resize(logo, (int(logo.shape[1] * scale_factor), int(logo.shape[0] * scale_factor)))
@@ -79,45 +137,21 @@ def remove_background_video(logo):
     """Menghilangkan latar belakang dari logo menggunakan thresholding."""
     gray = cv2.cvtColor(logo, cv2.COLOR_BGR2GRAY)
 
-    # Cek untuk background hitam
-    is_black_background = np.mean(gray) < 50  # Threshold untuk mendeteksi latar belakang hitam
-
-    # Membuat mask berdasarkan thresholding
-    _, mask = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
-
-    # Menggunakan mask untuk menghilangkan latar belakang
-    logo_with_mask = cv2.bitwise_and(logo, logo, mask=mask)
-
-    # Cek jumlah saluran logo
-    if logo.shape[2] == 3:  # RGB
-        # Jika logo adalah RGB, buat alpha channel dengan nilai penuh
-        b, g, r = cv2.split(logo)
-        alpha_channel = np.zeros(b.shape, dtype=b.dtype)  # Alpha channel kosong
-        alpha_channel[mask > 0] = 255  # Set alpha channel menjadi 255 di area yang tidak putih
-        logo_rgba = cv2.merge((b, g, r, alpha_channel))
-    elif logo.shape[2] == 4:  # RGBA
-        # Jika logo sudah memiliki alpha channel
-        b, g, r, a = cv2.split(logo)
-        # Buat mask baru yang berdasarkan warna putih
-        new_mask = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)[1]  # Mask untuk area putih
-        a[new_mask == 255] = 0  # Set alpha channel menjadi 0 di area putih
-        logo_rgba = cv2.merge((b, g, r, a))
-
-    # Jika latar belakang hitam, set alpha channel menjadi 0 di area hitam
-    if is_black_background:
-        alpha_channel[gray < 50] = 0  # Set alpha channel menjadi 0 di area hitam
+    # Alpha dihitung langsung dari mask: area putih (> 240) menjadi transparan
+    _, alpha = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
+    if logo.shape[2] == 4:
+        # Logo yang sudah memiliki alpha channel: area putih ikut dibuat transparan
+        alpha = np.minimum(logo[:, :, 3], alpha)
 
+    # Susun BGRA sekali tanpa split/merge channel
+    logo_rgba = np.empty(logo.shape[:2] + (4,), dtype=logo.dtype)
+    logo_rgba[:, :, :3] = logo[:, :, :3]
+    logo_rgba[:, :, 3] = alpha
     return logo_rgba
 
 def add_logo_watermark_video(frame, logo, position, opacity=1.0):
     """Menambahkan watermark logo ke frame dengan transparansi di posisi yang ditentukan."""
-    h, w, _ = logo.shape
-    for c in range(0, 3):
-        frame[position[1]:position[1]+h, position[0]:position[0]+w, c] = \
-            (logo[:, :, c] * (logo[:, :, 3] / 255.0 * opacity) +
-             frame[position[1]:position[1]+h, position[0]:position[0]+w, c] *
-             (1.0 - logo[:, :, 3] / 255.0 * opacity))
-    return frame
+    return composite_sprite(frame, logo, position, opacity)
 
 def add_text_watermark_video(frame, text, position, font_color, font_type, thickness=2, scale_factor=0.05, opacity=1.0):
     """Menambahkan watermark teks ke frame dengan transparansi di posisi yang ditentukan."""
@@ -137,22 +171,10 @@ def add_text_watermark_video(frame, text, position, font_color, font_type, thick
         # Jika font ditemukan di OpenCV
         text_size = cv2.getTextSize(text, font, scale, thickness)[0]
     else:
-        # Jika font tidak ditemukan di OpenCV, cari file TTF
-        ttf_font_path = os.path.join('Font', f"{font_type}.ttf")
-        #print(f"Looking for font at: {ttf_font_path}")  # Debug output
-        if os.path.exists(ttf_font_path):
-            #print("Font file found.")  # Debug output
-            # Convert OpenCV image to PIL image
-            pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            draw = ImageDraw.Draw(pil_image)
-            font = ImageFont.truetype(ttf_font_path, int(scale * 20))  # Adjust size as necessary
-            
-            # Get text bounding box with PIL
-            text_size = draw.textbbox((0, 0), text, font=font)
-            text_w = text_size[2] - text_size[0]
-            text_h = text_size[3] - text_size[1]
-        else:
-            raise ValueError(f"Font TTF '{ttf_font_path}' tidak ditemukan.")
+        # Jika font tidak ditemukan di OpenCV, render teks TTF ke sprite kecil (di-cache registry font, bukan per frame)
+        text_sprite, text_size = render_ttf_text(text, font_type, int(scale * 20), font_color)  # Adjust size as necessary
+        text_w = text_size[2] - text_size[0]
+        text_h = text_size[3] - text_size[1]
 
     # Menentukan posisi teks
     if text_size is not None:
@@ -164,54 +186,57 @@ def add_text_watermark_video(frame, text, position, font_color, font_type, thick
             text_size = (text_w, text_h)
 
         # Menentukan posisi berdasarkan parameter
-        if position == 'tengah tengah':  # Tengah
-            position = ((frame.shape[1] - text_size[0]) // 2, (frame.shape[0] + text_size[1]) // 2)
-        elif position == 'atas kanan':  # Kanan Atas
-            position = (frame.shape[1] - text_size[0] - 10, text_size[1] + 10)
-        elif position == 'bawah kanan':  # Kanan Bawah
-            position = (frame.shape[1] - text_size[0] - 10, frame.shape[0] - text_size[1] - 10)
-        elif position == 'atas kiri':  # Kiri Atas
-            position = (10, text_size[1] + 10)
-        elif position == 'bawah kiri':  # Kiri Bawah
-            position = (10, frame.shape[0] - text_size[1] - 10)
-        elif position == 'atas tengah':  # Tengah Atas
-            position = ((frame.shape[1] - text_size[0]) // 2, text_size[1] + 10)
-        elif position == 'bawah tengah':  # Tengah Bawah
-            position = ((frame.shape[1] - text_size[0]) // 2, frame.shape[0] - text_size[1] - 10)
-        elif position == 'tengah kiri':  # Kiri Tengah
-            position = (10, (frame.shape[0] - text_size[1]) // 2)
-        elif position == 'tengah kanan':  # Kanan Tengah
-            position = (frame.shape[1] - text_size[0] - 10, (frame.shape[0] - text_size[1]) // 2)
-        else:
-            raise ValueError(f"Posisi '{position}' tidak dikenal.")
-
-        # Pastikan posisi teks tidak keluar dari batas gambar
-        x, y = position
-        x = max(0, min(x, frame.shape[1] - text_size[0]))  # Batasi x
-        y = max(text_size[1], min(y, frame.shape[0] - 1))  # Batasi y, pastikan tidak kurang dari tinggi teks
-        position = (x, y)
-
-        overlay = frame.copy()
+        position = get_text_position_video(frame, text_size, position)
 
         # Memastikan position adalah tuple dengan dua nilai
         if isinstance(position, tuple) and len(position) == 2:
             if use_opencv:
+                overlay = frame.copy()
                 cv2.putText(overlay, text, position, font, scale, font_color, thickness, cv2.LINE_AA)
+
+                # Menggabungkan teks dengan transparansi
+                cv2.addWeighted(overlay, opacity, frame, 1 - opacity, 0, frame)
             else:
-                # Jika menggunakan TTF, tambahkan teks menggunakan pil_image
-                draw = ImageDraw.Draw(pil_image)
-                font_color = font_color[::-1]  # Konversi warna ke RGB untuk TTF
-                draw.text(position, text, font=font, fill=font_color)
-                overlay = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-
-            # Menggabungkan teks dengan transparansi
-            cv2.addWeighted(overlay, opacity, frame, 1 - opacity, 0, frame)
+                # Jika menggunakan TTF, sprite teks ditempel dengan transparansi hanya pada area teks
+                composite_sprite(frame, text_sprite, position, opacity)
         else:
             raise ValueError("Posisi harus berupa tuple yang berisi dua nilai (x, y).")
 
     return frame
 
 
+def get_text_position_video(frame, text_size, position):
+    """Mengembalikan titik awal teks (x, y) berdasarkan string posisi, dibatasi agar tetap di dalam frame."""
+    if position == 'tengah tengah':  # Tengah
+        position = ((frame.shape[1] - text_size[0]) // 2, (frame.shape[0] + text_size[1]) // 2)
+    elif position == 'atas kanan':  # Kanan Atas
+        position = (frame.shape[1] - text_size[0] - 10, text_size[1] + 10)
+    elif position == 'bawah kanan':  # Kanan Bawah
+        position = (frame.shape[1] - text_size[0] - 10, frame.shape[0] - text_size[1] - 10)
+    elif position == 'atas kiri':  # Kiri Atas
+        position = (10, text_size[1] + 10)
+    elif position == 'bawah kiri':  # Kiri Bawah
+        position = (10, frame.shape[0] - text_size[1] - 10)
+    elif position == 'atas tengah':  # Tengah Atas
+        position = ((frame.shape[1] - text_size[0]) // 2, text_size[1] + 10)
+    elif position == 'bawah tengah':  # Tengah Bawah
+        position = ((frame.shape[1] - text_size[0]) // 2, frame.shape[0] - text_size[1] - 10)
+    elif position == 'tengah kiri':  # Kiri Tengah
+        position = (10, (frame.shape[0] - text_size[1]) // 2)
+    elif position == 'tengah kanan':  # Kanan Tengah
+        position = (frame.shape[1] - text_size[0] - 10, (frame.shape[0] - text_size[1]) // 2)
+    elif position == 'auto':  # Posisi awal; per frame diganti oleh AutoPositionTracker
+        position = (frame.shape[1] - text_size[0] - 10, frame.shape[0] - text_size[1] - 10)
+    else:
+        raise ValueError(f"Posisi '{position}' tidak dikenal.")
+
+    # Pastikan posisi teks tidak keluar dari batas gambar
+    x, y = position
+    x = max(0, min(x, frame.shape[1] - text_size[0]))  # Batasi x
+    y = max(text_size[1], min(y, frame.shape[0] - 1))  # Batasi y, pastikan tidak kurang dari tinggi teks
+    position = (x, y)
+    return position
+
 def get_watermark_position_video(frame, watermark, position_str):
     """Mengembalikan koordinat (x, y) berdasarkan string posisi yang diberikan."""
     frame_h, frame_w, _ = frame.shape
@@ -232,8 +257,371 @@ def get_watermark_position_video(frame, watermark, position_str):
     return positions.get(position_str.lower(), (frame_w - logo_w, frame_h - logo_h))
     #return positions.get(position_str, (frame_w - logo_w, frame_h - logo_h))
 
+class PreparedLogoWatermark:
+    """Logo watermark yang disiapkan sekali per video: sprite RGBA, alpha, dan posisi tetap dipakai ulang di setiap frame."""
+
+    def __init__(self, frame, logo, position_str, scale_factor=0.3, opacity=0.6, logo_key=None):
+        # Resize dan hilangkan latar belakang logo hanya sekali (dan diambil dari cache proses untuk video berikutnya)
+        if logo_key is None:
+            logo_key = logo_content_key(logo)
+        target_size = (int(logo.shape[1] * scale_factor), int(logo.shape[0] * scale_factor))
+        self.sprite = logo_cache.get_or_create(('video', logo_key) + target_size, lambda: preprocess_logo_video(logo, scale_factor))
+        self.position = get_watermark_position_video(frame, self.sprite, position_str)
+
+        # Precompute alpha (sudah dikali opacity) dan warna logo yang sudah dikali alpha
+        self.composite = CompositeSprite(self.sprite, opacity)
+
+    def apply(self, frame, position=None):
+        """Menempelkan logo yang sudah disiapkan ke frame (in place); position menggantikan posisi tetap jika diberikan."""
+        return self.composite.blend_into(frame, self.position if position is None else position)
+
+class PreparedTextWatermark:
+    """Teks watermark yang dirender sekali menjadi sprite kecil (warna + alpha) lalu ditempel per frame hanya di area teks."""
+
+    def __init__(self, frame, text, position_str, font_color, font_type, thickness=2, scale_factor=0.05, opacity=1.0):
+        scale = scale_factor * frame.shape[1] / 1000  # Menyesuaikan ukuran teks
+
+        # Coba mendapatkan font OpenCV, jika tidak ada gunakan file TTF
+        try:
+            font, size = get_cv2_font(font_type), scale
+        except ValueError:
+            font, size = font_type, int(scale * 20)  # Ukuran piksel font TTF
+
+        # Sprite sama seperti watermark gambar (build_text_sprite); posisi teks dikurangi anchor sprite
+        self.sprite, anchor, text_size = build_text_sprite(text, font, size, font_color, thickness)
+        position = get_text_position_video(frame, text_size, position_str)
+        self.position = (position[0] - anchor[0], position[1] - anchor[1])
+
+        self.composite = CompositeSprite(self.sprite, opacity)
+
+    def apply(self, frame, position=None):
+        """Menempelkan sprite teks ke frame (in place), hanya pada bounding box teks; position menggantikan posisi tetap jika diberikan."""
+        return self.composite.blend_into(frame, self.position if position is None else position)
+
+def prepare_video_watermark(frame, watermark_type, options, logo=None, logo_key=None):
+    """PreparedLogoWatermark atau PreparedTextWatermark untuk frame dari opsi add_watermark_to_multiple_videos.
+
+    Default opsi sama dengan add_watermark_to_multiple_videos; sprite hanya bergantung pada ukuran frame (teks)
+    atau tidak sama sekali (logo).
+    """
+    if watermark_type == 'logo':
+        return PreparedLogoWatermark(frame, logo, options.get('position_str', 'kanan bawah'), options.get('scale_factor', 0.3),
+                                     options.get('opacity', 0.6), logo_key)
+
+    # Warna font dari hex atau nama warna (putih jika tidak diberikan)
+    font_color = get_color_from_string(options.get('font_color', '#FFFFFF'))
+    return PreparedTextWatermark(frame, options.get('text', ''), options.get('position_str', 'bawah kanan'), font_color,
+                                 options.get('font_type', 'hershey simplex'), options.get('thickness', 2),
+                                 options.get('scale_factor', 0.5), options.get('opacity', 0.6))
+
+class AutoPositionTracker:
+    """Penempatan 'auto' untuk video: saliency hanya dihitung pada frame sampel dan posisi dijaga stabil.
+
+    Frame sampel adalah setiap sample_every frame, ditambah frame pertama setelah pergantian adegan yang dideteksi
+    dari selisih rata-rata thumbnail abu-abu kecil. Peta saliency (sisi terpanjang max_side) dari window sampel
+    terakhir dirata-rata. Watermark hanya dipindah jika total saliency jendela terbaik lebih kecil dari
+    (1 - hysteresis) kali jendela saat ini; saat pergantian adegan posisi langsung dipilih ulang.
+    update() harus dipanggil berurutan sesuai frame.
+    """
+
+    def __init__(self, watermark_size, sample_every=30, window=3, hysteresis=0.25, scene_cut_threshold=30.0, max_side=256):
+        self.watermark_h, self.watermark_w = watermark_size
+        self.sample_every = max(1, sample_every)
+        self.hysteresis = hysteresis
+        self.scene_cut_threshold = scene_cut_threshold
+        self.max_side = max_side
+        self.saliency_maps = deque(maxlen=window)
+        self.previous_thumbnail = None
+        self.position = None
+
+    def is_scene_cut(self, frame):
+        """Mendeteksi pergantian adegan dari selisih rata-rata thumbnail 64x36 dengan frame sebelumnya."""
+        thumbnail = cv2.cvtColor(cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        previous, self.previous_thumbnail = self.previous_thumbnail, thumbnail
+        return previous is not None and cv2.absdiff(thumbnail, previous).mean() > self.scene_cut_threshold
+
+    def update(self, frame, frame_index):
+        """Mengembalikan posisi kiri atas watermark untuk frame ini."""
+        scene_cut = self.is_scene_cut(frame)
+        if not scene_cut and self.saliency_maps and frame_index % self.sample_every != 0:
+            return self.position
+
+        if scene_cut:
+            self.saliency_maps.clear()  # Saliency adegan lama tidak relevan lagi
+        self.saliency_maps.append(calculate_saliency(frame, self.max_side))
+        saliency_map = self.saliency_maps[0] if len(self.saliency_maps) == 1 else np.mean(self.saliency_maps, axis=0)
+
+        # Nilai setiap jendela seukuran watermark pada resolusi peta saliency
+        frame_h, frame_w = frame.shape[:2]
+        scale_x, scale_y = saliency_map.shape[1] / frame_w, saliency_map.shape[0] / frame_h
+        window_sums = window_saliency_sums(saliency_map, (max(1, int(round(self.watermark_h * scale_y))), max(1, int(round(self.watermark_w * scale_x)))))
+        best_y, best_x = np.unravel_index(np.argmin(window_sums), window_sums.shape)
+
+        if self.position is not None and not scene_cut:
+            # Hysteresis: tetap di posisi sekarang kecuali jendela terbaik jauh lebih baik
+            current_x = min(int(round(self.position[0] * scale_x)), window_sums.shape[1] - 1)
+            current_y = min(int(round(self.position[1] * scale_y)), window_sums.shape[0] - 1)
+            if window_sums[best_y, best_x] >= (1.0 - self.hysteresis) * window_sums[current_y, current_x]:
+                return self.position
+
+        # Petakan kembali ke resolusi penuh dan jaga agar watermark tetap di dalam frame
+        self.position = (min(max(int(round(best_x / scale_x)), 0), max(frame_w - self.watermark_w, 0)),
+                         min(max(int(round(best_y / scale_y)), 0), max(frame_h - self.watermark_h, 0)))
+        return self.position
+
+def process_video_frame(frame, prepared_watermark=None, enhance_quality=True, frame_index=0, enhance_every=None, position=None):
+    """Memproses satu frame: enhancement (opsional) lalu menempelkan watermark yang sudah disiapkan.
+
+    enhance_every > 1 hanya meng-enhance setiap frame ke-N (frame_index kelipatan N) untuk menghemat waktu;
+    None memakai default profil (lihat VIDEO_ENHANCEMENT_PROFILES). position (misalnya dari AutoPositionTracker)
+    menggantikan posisi tetap watermark untuk frame ini.
+    """
+    # Proses denoise dan sharpening frame jika diperlukan (profil di-resolve dulu: 'off' juga string)
+    profile = get_enhancement_profile(enhance_quality)
+    if profile != 'off':
+        if enhance_every is None:
+            enhance_every = VIDEO_ENHANCEMENT_PROFILES[profile][1]
+        if frame_index % enhance_every == 0:
+            frame = enhance_frame(frame, profile)
+
+    # Tambahkan logo / sprite teks watermark yang sudah disiapkan
+    if prepared_watermark is not None:
+        frame = prepared_watermark.apply(frame, position)
+    return frame
+
+def run_frame_pipeline(cap, out, first_frame, process_frame, workers=4, queue_depth=32, position_tracker=None, timer=None, cancel_token=None, on_frame=None):
+    """Menjalankan pipeline thread reader -> pool worker -> writer berurutan yang dihubungkan queue terbatas.
+
+    Reader membaca frame dari cap, worker menjalankan process_frame(frame, frame_index=..., position=...) secara paralel,
+    dan writer menulis hasil ke out sesuai urutan frame asli. queue_depth membatasi jumlah frame yang tertahan di memori.
+    position_tracker (AutoPositionTracker) dijalankan berurutan di thread reader. timer (StageTotals, opsional)
+    menjumlahkan waktu decode, auto_position, process dan encode. cancel_token (CancelToken) diperiksa reader
+    setiap frame dan on_frame(jumlah frame tertulis) dipanggil writer. Mengembalikan jumlah frame yang ditulis.
+    """
+    read_frame = timed(timer, 'decode', cap.read)
+    write_frame = timed(timer, 'encode', out.write)
+    process_frame = timed(timer, 'process', process_frame)
+    update_position = timed(timer, 'auto_position', position_tracker.update) if position_tracker is not None else None
+    written = [0]
+    frame_queue = queue.Queue(maxsize=queue_depth)   # Frame hasil decode yang menunggu diproses
+    result_queue = queue.Queue(maxsize=queue_depth)  # Future hasil proses, urut sesuai frame
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        try:
+            frame, frame_index = first_frame, 0
+            while frame is not None and not stop.is_set():
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                position = update_position(frame, frame_index) if update_position is not None else None
+                frame_queue.put((frame_index, frame, position))
+                frame_index += 1
+                ret, frame = read_frame()
+                if not ret:
+                    frame = None
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            frame_queue.put(None)  # Tanda akhir video
+
+    def writer():
+        while True:
+            future = result_queue.get()
+            if future is None:
+                break
+            if stop.is_set():
+                continue  # Tetap kosongkan queue agar thread lain tidak macet
+            try:
+                write_frame(future.result())
+                written[0] += 1
+                if on_frame is not None:
+                    on_frame(written[0])
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    reader_thread.start()
+    writer_thread.start()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            if not stop.is_set():
+                frame_index, frame, position = item
+                result_queue.put(executor.submit(process_frame, frame, frame_index=frame_index, position=position))
+        result_queue.put(None)
+        writer_thread.join()
+    reader_thread.join()
+
+    if errors:
+        raise errors[0]
+    return written[0]
+
+# Kontrol job untuk proses worker segmen (event pembatalan, penghitung frame bersama), diberikan saat proses dibuat
+_segment_control = {}
+
+def _init_segment_worker(cancel_event, frames_done):
+    """Menyimpan event pembatalan dan penghitung frame bersama di proses worker segmen."""
+    _segment_control.update(cancel_event=cancel_event, frames_done=frames_done)
+
+def process_video_segment(video_path, segment_path, fourcc, fps, frame_size, start_frame, end_frame, process_frame, positions=None):
+    """Memproses rentang frame [start_frame, end_frame) dari video ke file segmen (dijalankan di proses terpisah).
+
+    end_frame None berarti baca sampai akhir video. Mengembalikan jumlah frame yang ditulis.
+    positions (jika ada) adalah posisi watermark 'auto' per frame segmen dari compute_auto_positions; frame di
+    luar list (jumlah frame header tidak tepat) memakai posisi terakhir.
+    Jika proses dibuat oleh run_segmented_video dengan kontrol job, pembatalan diperiksa dan frame dihitung per frame.
+    """
+    cancel_event, frames_done = _segment_control.get('cancel_event'), _segment_control.get('frames_done')
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)  # Lompat ke frame awal segmen
+    out = cv2.VideoWriter(segment_path, fourcc, fps, frame_size)
+
+    written = 0
+    try:
+        while end_frame is None or start_frame + written < end_frame:
+            if cancel_event is not None and cancel_event.is_set():
+                raise JobCancelled("Proses dibatalkan")
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_index = start_frame + written
+            position = positions[min(written, len(positions) - 1)] if positions else None
+            out.write(process_frame(frame, frame_index=frame_index, position=position))
+            written += 1
+            if frames_done is not None:
+                with frames_done.get_lock():
+                    frames_done.value += 1
+    finally:
+        cap.release()
+        out.release()
+
+    return written
+
+def stitch_video_segments(segment_paths, output_video_path, fourcc, fps, frame_size):
+    """Menggabungkan file segmen sesuai urutan menjadi video output."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        # Segmen sudah memakai codec output, cukup digabung tanpa encode ulang (concat demuxer)
+        # Path dikutip tunggal; tanda kutip di dalam path ditulis sebagai '\'' sesuai aturan quoting ffmpeg
+        list_path = os.path.join(os.path.dirname(segment_paths[0]), 'segments.txt')
+        with open(list_path, 'w', encoding='utf-8') as list_file:
+            for segment_path in segment_paths:
+                quoted_path = segment_path.replace("'", "'\\''")
+                list_file.write(f"file '{quoted_path}'\n")
+        command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_video_path]
+        if subprocess.run(command).returncode == 0:
+            return
+
+    # Tanpa ffmpeg: decode segmen (lossless) dan encode sekali ke output
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, frame_size)
+    try:
+        for segment_path in segment_paths:
+            cap = cv2.VideoCapture(segment_path)
+            ret, frame = cap.read()
+            while ret:
+                out.write(frame)
+                ret, frame = cap.read()
+            cap.release()
+    finally:
+        out.release()
+
+def compute_auto_positions(video_path, position_tracker, cancel_token=None):
+    """Posisi watermark 'auto' untuk setiap frame video dalam satu pass berurutan.
+
+    Dipakai sebelum video dibagi menjadi segmen, sehingga hysteresis dan deteksi pergantian adegan berjalan
+    melintasi batas segmen seperti pada mode berurutan. Hanya decode dan thumbnail per frame (saliency hanya pada
+    frame sampel), jauh lebih ringan dari pemrosesan frame itu sendiri.
+    """
+    cap = cv2.VideoCapture(video_path)
+    positions = []
+    try:
+        ret, frame = cap.read()
+        while ret:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            positions.append(position_tracker.update(frame, len(positions)))
+            ret, frame = cap.read()
+    finally:
+        cap.release()
+    return positions
+
+def run_segmented_video(video_path, output_video_path, fourcc, fps, frame_size, total_frames, segments, process_frame, workers=None, position_tracker=None, metrics=None, cancel_token=None, progress=None):
+    """Membagi video menjadi beberapa rentang frame, memproses tiap segmen di proses terpisah, lalu menyambungnya berurutan.
+
+    process_frame dipanggil sebagai process_frame(frame, frame_index=...) di proses worker, jadi harus bisa di-pickle.
+    position_tracker (posisi 'auto') dijalankan sekali untuk seluruh video sebelum segmen dibagi (compute_auto_positions).
+    metrics (JobMetrics, opsional) mencatat tahap auto_position, segments dan stitch. cancel_token (CancelToken) diteruskan
+    ke proses worker lewat event bersama, dan progress (ProgressReporter) membaca penghitung frame bersama selama menunggu
+    segmen. Mengembalikan jumlah frame yang ditulis.
+    """
+    # Jika ffmpeg tersedia, segmen ditulis dengan codec output agar bisa digabung tanpa encode ulang.
+    # Jika tidak, segmen ditulis lossless (FFV1) sehingga hasil akhirnya tetap hanya di-encode sekali.
+    if shutil.which('ffmpeg'):
+        segment_fourcc, segment_ext = fourcc, os.path.splitext(output_video_path)[1]
+    else:
+        segment_fourcc, segment_ext = cv2.VideoWriter_fourcc(*'FFV1'), '.avi'
+
+    # Rentang frame per segmen; segmen terakhir dibaca sampai akhir karena CAP_PROP_FRAME_COUNT bisa tidak tepat
+    bounds = [total_frames * i // segments for i in range(segments)] + [None]
+
+    # Posisi 'auto' dipilih dalam satu pass agar tidak melompat di setiap batas segmen
+    segment_positions = [None] * segments
+    if position_tracker is not None:
+        with measure_stage(metrics, 'auto_position') as stage:
+            positions = compute_auto_positions(video_path, position_tracker, cancel_token)
+            stage['frames'] = len(positions)
+        segment_positions = [positions[bounds[i]:bounds[i + 1]] for i in range(segments)]
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_video_path)) as segment_dir:
+        segment_paths = [os.path.join(segment_dir, f"segment_{i:04d}{segment_ext}") for i in range(segments)]
+        # Event dan penghitung bersama hanya bisa diberikan ke proses worker saat proses dibuat (initializer)
+        context = multiprocessing.get_context()
+        cancel_event = context.Event() if cancel_token is not None else None
+        frames_done = context.Value('q', 0) if progress is not None else None
+        poll_interval = max(progress.interval, 0.05) if progress is not None else (0.2 if cancel_token is not None else None)
+
+        with measure_stage(metrics, 'segments') as stage, ProcessPoolExecutor(
+                max_workers=workers or segments, mp_context=context, initializer=_init_segment_worker, initargs=(cancel_event, frames_done)) as executor:
+            futures = [
+                executor.submit(process_video_segment, video_path, segment_paths[i], segment_fourcc, fps, frame_size,
+                                bounds[i], bounds[i + 1], process_frame, segment_positions[i])
+                for i in range(segments)
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=poll_interval)
+                if progress is not None:
+                    progress.update(frames_done.value)
+                if cancel_token is not None and cancel_token.is_cancelled():
+                    cancel_event.set()
+            written = sum(future.result() for future in futures)  # Lempar error dari proses worker jika ada
+            stage['frames'] = written
+
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with measure_stage(metrics, 'stitch'):
+            stitch_video_segments(segment_paths, output_video_path, fourcc, fps, frame_size)
+    return written
+
 def add_watermark_to_multiple_videos(video_path, watermark_type, output_format='mp4', **kwargs):
-    """Menambahkan watermark ke video berdasarkan jenis watermark yang dipilih."""
+    """Menambahkan watermark ke video berdasarkan jenis watermark yang dipilih.
+
+    kwargs['metrics'] (JobMetrics, opsional) mencatat tahap open, logo_decode, prepare, frame_loop (beserta
+    jumlah frame) dan total waktu decode, auto_position, process dan encode seluruh frame.
+    kwargs['progress_callback'] dipanggil dengan progres (lihat ProgressReporter) paling sering setiap
+    kwargs['progress_interval'] detik (default 0.5) dan sekali di akhir. kwargs['cancel_token'] (CancelToken)
+    diperiksa setiap frame; jika dibatalkan, video input/output dilepas, output yang belum selesai dihapus,
+    dan hasilnya [input_path, pesan pembatalan].
+    """
+    metrics = kwargs.get('metrics')
+    cancel_token = kwargs.get('cancel_token')
     output_result = [os.path.abspath(video_path), '']  # Inisialisasi list strict dengan 2 item: [file_path, error_message]
 
     # Tentukan codec video berdasarkan format output
@@ -247,9 +635,17 @@ def add_watermark_to_multiple_videos(video_path, watermark_type, output_format='
         output_result[1] = f"Tipe format output '{output_format}' tidak didukung. Pilih antara 'mp4', 'avi', atau 'mov'."
         return output_result
 
+    enhance_every = kwargs.get('enhance_every')
+    if enhance_every is not None and (not isinstance(enhance_every, int) or enhance_every < 1):
+        output_result[1] = f"enhance_every harus bilangan bulat >= 1 (diberikan {enhance_every!r})."
+        return output_result
+
+    cap = out = progress = None
+    output_video_path, output_started = None, False
     try:
         # Coba buka video input
-        cap = cv2.VideoCapture(video_path)
+        with measure_stage(metrics, 'open'):
+            cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             output_result[1] = f"Video tidak dapat dibuka: {video_path}"
             return output_result
@@ -266,83 +662,123 @@ def add_watermark_to_multiple_videos(video_path, watermark_type, output_format='
         output_result[0] = output_video_path  # Set output path
         #output_result[0] = output_video_path  # Set output path
 
-        # Buat video writer
-        out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-
-        enhance_quality = kwargs.get('enhance_quality',True)
+        # Handler mengirim 'enchance_quality'; 'enhance_quality' tetap diterima. Tanpa keduanya, tanpa enhancement.
+        enhance_quality = get_enhancement_profile(kwargs.get('enchance_quality', kwargs.get('enhance_quality')))
 
         # Proses frame video
-        ret, frame = cap.read()
-        while ret:
-            # Tambahkan watermark berdasarkan jenis yang dipilih
-            # Proses denoise dan sharpening frame jika diperlukan
-    
-            if enhance_quality:
-                #print("preprocess")
-                frame = denoise_frame(frame)
-                frame = sharpen_frame(frame)
-            #print('Tidak Preprocess')
-            if watermark_type == 'logo':
-                logo_path = kwargs.get('logo_path')
-                position_str = kwargs.get('position_str', 'kanan bawah')
-                opacity = kwargs.get('opacity', 0.6)
-
-                # Cek dan konversi logo jika perlu (JPG/JPEG ke PNG)
-                if logo_path.lower().endswith(('.jpg', '.jpeg')):
-                    logo_image = cv2.imread(logo_path)
-                    if logo_image is None:
-                        output_result[1] = f"Logo tidak dapat dibuka: {logo_path}"
-                        cap.release()
-                        return output_result
-                    # Simpan logo sebagai PNG sementara
-                    logo_path = logo_path.replace('.jpg', '.png').replace('.jpeg', '.png')
-                    cv2.imwrite(logo_path, logo_image, [cv2.IMWRITE_PNG_COMPRESSION, 0])
-
-                # Load logo dan preprocess
-                logo = cv2.imread(logo_path, cv2.IMREAD_UNCHANGED)
-                if logo is None:
-                    output_result[1] = f"Logo tidak dapat dibuka: {logo_path}"
-                    cap.release()
-                    return output_result
-                logo = preprocess_logo_video(logo, kwargs.get('scale_factor', 0.3))
-
-                # Dapatkan posisi watermark
-                position = get_watermark_position_video(frame, logo, position_str)
-
-                # Tambahkan logo watermark
-                frame = add_logo_watermark_video(frame, logo, position, opacity)
-
-            elif watermark_type == 'text':
-                text = kwargs.get('text', '')
-                position_str = kwargs.get('position_str', 'bawah kanan')
-
-                # Dapatkan warna font dari input user (gunakan putih sebagai default)
-                color_str = kwargs.get('font_color', '#FFFFFF')
-                font_color = get_color_from_string(color_str)  # Ambil warna dari hex atau nama warna
-
-                thickness = kwargs.get('thickness', 2)
-                scale_factor = kwargs.get('scale_factor', 0.5)
-                opacity = kwargs.get('opacity', 0.6)
-                font_type = kwargs.get('font_type', 'hershey simplex')
-
-                # Tambahkan teks watermark
-                frame = add_text_watermark_video(frame, text, position_str, font_color, font_type, thickness, scale_factor, opacity)
-
-            # Tulis frame ke video output
-            out.write(frame)
-
-            # Baca frame berikutnya
+        with measure_stage(metrics, 'decode'):
             ret, frame = cap.read()
 
+        # Siapkan logo watermark sekali saja sebelum loop frame (bukan per frame)
+        prepared_watermark = None
+        if watermark_type == 'logo' and ret:
+            logo_path = kwargs.get('logo_path')
+
+            # Load logo dan preprocess (gunakan logo yang sudah di-decode jika diberikan, misalnya dari batch)
+            logo, logo_key = kwargs.get('logo_image'), kwargs.get('logo_key')
+            if logo is None:
+                with measure_stage(metrics, 'logo_decode'):
+                    logo, logo_key = load_logo_entry(logo_path)
+            if logo is None:
+                output_result[1] = f"Logo tidak dapat dibuka: {describe_logo_source(logo_path)}"
+                cap.release()
+                return output_result
+            with measure_stage(metrics, 'prepare'):
+                prepared_watermark = prepare_video_watermark(frame, 'logo', kwargs, logo, logo_key)
+
+        # Render teks watermark sekali saja menjadi sprite kecil
+        if watermark_type == 'text' and ret:
+            with measure_stage(metrics, 'prepare'):
+                prepared_watermark = prepare_video_watermark(frame, 'text', kwargs)
+
+        process_frame = partial(process_video_frame, prepared_watermark=prepared_watermark,
+                                enhance_quality=enhance_quality, enhance_every=enhance_every)
+
+        # Posisi 'auto': saliency dihitung pada frame sampel saja, posisi dijaga stabil dengan hysteresis
+        position_tracker = None
+        if prepared_watermark is not None and str(kwargs.get('position_str', '')).lower() == 'auto':
+            position_tracker = AutoPositionTracker(
+                prepared_watermark.sprite.shape[:2], kwargs.get('auto_sample_every', 30), kwargs.get('auto_window', 3),
+                kwargs.get('auto_hysteresis', 0.25), kwargs.get('auto_scene_cut', 30.0), kwargs.get('auto_max_side', 256)
+            )
+
+        segments = kwargs.get('segments', 0)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if kwargs.get('progress_callback') is not None:
+            progress = ProgressReporter(kwargs['progress_callback'], total_frames, kwargs.get('progress_interval', 0.5), os.path.abspath(video_path))
+
+        if ret and segments and segments > 1 and total_frames > segments:
+            # Mode segmen: video dibagi per rentang frame dan diproses di beberapa proses sekaligus
+            cap.release()
+            output_started = True
+            run_segmented_video(video_path, output_video_path, fourcc, fps, (width, height), total_frames, segments,
+                                process_frame, kwargs.get('segment_workers'), position_tracker, metrics, cancel_token, progress)
+            if progress is not None:
+                progress.finish('done')
+            return output_result
+
+        # Buat video writer
+        output_started = True
+        out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+
+        # Waktu per frame dijumlahkan lalu dicatat sekali setelah loop (bukan satu record per frame)
+        timer = metrics.frame_timer() if metrics is not None else None
+        pipeline_workers = kwargs.get('pipeline_workers', 0)
+        with measure_stage(metrics, 'frame_loop') as stage:
+            if ret and pipeline_workers:
+                # Mode pipeline: decode, proses dan encode berjalan bersamaan di thread terpisah
+                frame_index = run_frame_pipeline(cap, out, frame, process_frame, pipeline_workers, kwargs.get('pipeline_queue_depth', 32), position_tracker, timer,
+                                                 cancel_token, progress.update if progress is not None else None)
+            else:
+                read_frame = timed(timer, 'decode', cap.read)
+                write_frame = timed(timer, 'encode', out.write)
+                process_frame = timed(timer, 'process', process_frame)
+                update_position = timed(timer, 'auto_position', position_tracker.update) if position_tracker is not None else None
+
+                frame_index = 0
+                while ret:
+                    # Pembatalan kooperatif: diperiksa sebelum setiap frame
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+
+                    # Tulis frame ke video output
+                    position = update_position(frame, frame_index) if update_position is not None else None
+                    write_frame(process_frame(frame, frame_index=frame_index, position=position))
+
+                    # Baca frame berikutnya
+                    ret, frame = read_frame()
+                    frame_index += 1
+                    if progress is not None:
+                        progress.update(frame_index)
+            stage['frames'] = frame_index
+        if timer is not None:
+            timer.flush()
+
         # Bersihkan resources
         cap.release()
         out.release()
+        if progress is not None:
+            progress.finish('done')
 
     except Exception as e:
-        # Jika terjadi error, tambahkan pesan error
-        output_result[1] = f"Error while embedding watermark: {str(e)}"
+        # Jika terjadi error atau job dibatalkan, tambahkan pesan error
+        cancelled = isinstance(e, JobCancelled)
+        output_result[1] = "Proses watermark video dibatalkan" if cancelled else f"Error while embedding watermark: {str(e)}"
         output_result[0] = os.path.abspath(video_path)# Set path video input yang gagal sebagai output
 
+        # Lepaskan video input/output lalu hapus output yang belum selesai ditulis
+        if cap is not None:
+            cap.release()
+        if out is not None:
+            out.release()
+        if output_started and os.path.exists(output_video_path):
+            try:
+                os.remove(output_video_path)
+            except OSError:
+                pass
+        if progress is not None:
+            progress.finish('cancelled' if cancelled else 'error')
+
     cv2.destroyAllWindows()
 
     return output_result  # Return output result yang berisi [Output Video Path, Error Message]
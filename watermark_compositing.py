@@ -0,0 +1,47 @@
+import numpy as np
+
+class CompositeSprite:
+    """Sprite watermark BGRA yang alpha-nya sudah di-precompute (fixed-point, premultiplied) untuk blending cepat.
+
+    Alpha disimpan dalam skala 0..256 (uint16) sudah dikali opacity, dan warna sprite disimpan
+    premultiplied (warna * alpha + 128 untuk pembulatan), sehingga blending per piksel cukup:
+    hasil = (premultiplied + latar * (256 - alpha)) >> 8
+    dalam satu operasi vektor untuk ketiga channel sekaligus, tanpa float dan tanpa salinan gambar penuh.
+    """
+
+    def __init__(self, sprite, opacity=1.0):
+        if sprite.shape[2] == 4:
+            alpha = sprite[:, :, 3:4].astype(np.float32)
+        else:
+            # Sprite tanpa alpha channel dianggap opaque penuh
+            alpha = np.full(sprite.shape[:2] + (1,), 255.0, dtype=np.float32)
+
+        # Skala alpha ke 0..256 agar pembagian cukup dengan shift 8 bit
+        alpha_fixed = np.rint(alpha * (opacity * 256.0 / 255.0)).astype(np.uint16)
+        self.premultiplied = sprite[:, :, :3].astype(np.uint16) * alpha_fixed + 128
+        # Inverse alpha disimpan per channel agar perkalian tidak perlu broadcasting
+        self.inverse_alpha = np.repeat(256 - alpha_fixed, 3, axis=2)
+        self.height, self.width = sprite.shape[:2]
+
+    def blend_into(self, image, position):
+        """Mencampur sprite ke image (in place) dengan titik kiri atas di position, dipotong jika keluar batas."""
+        x, y = int(position[0]), int(position[1])
+        image_h, image_w = image.shape[:2]
+
+        # Potong bagian sprite yang berada di luar gambar
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, image_w), min(y + self.height, image_h)
+        if x0 >= x1 or y0 >= y1:
+            return image
+
+        sx, sy = x0 - x, y0 - y
+        roi = image[y0:y1, x0:x1]
+        blended = np.multiply(roi, self.inverse_alpha[sy:sy + y1 - y0, sx:sx + x1 - x0], dtype=np.uint16)
+        blended += self.premultiplied[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        blended >>= 8
+        np.copyto(roi, blended, casting='unsafe')
+        return image
+
+def composite_sprite(image, sprite, position, opacity=1.0):
+    """Menempelkan sprite BGRA ke image (in place) pada position dengan opacity tertentu."""
+    return CompositeSprite(sprite, opacity).blend_into(image, position)
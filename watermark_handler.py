@@ -1,6 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from font_registry import font_registry
 from image_watermark_choice import process_multiple_files as process_images
+from image_watermark_choice import get_cv2_fonts, get_color_from_string, load_logo_entry
+from job_metrics import JobMetrics
+from logo_cache import describe_logo_source
+from result_cache import ResultCache
 from video_watermark_choice import add_watermark_to_multiple_videos as process_videos
 
+# Opsi khusus video: hanya diteruskan ke add_watermark_to_multiple_videos, tidak ke pemrosesan gambar/PDF
+VIDEO_OPTIONS = (
+    'progress_callback', 'progress_interval', 'cancel_token', 'pipeline_workers', 'pipeline_queue_depth', 'segments',
+    'segment_workers', 'enhance_every', 'auto_sample_every', 'auto_window', 'auto_hysteresis', 'auto_scene_cut', 'auto_max_side'
+)
+
+# Watermark bersama (logo yang sudah di-decode, warna yang sudah di-parse) untuk proses worker batch
+_shared_watermark = {}
+
+def _init_batch_worker(shared_watermark, font_paths=None):
+    """Menyimpan watermark bersama di proses worker sekali saja, bukan dikirim ulang per file.
+
+    font_paths (lihat WatermarkHandler.prepare_shared_fonts) berisi path font TTF yang sudah di-resolve proses
+    utama, sehingga worker tidak mencari folder font lagi. Sprite dibuat worker sendiri saat file pertama dengan
+    ukuran tersebut di-decode, lalu dipakai ulang dari cache worker.
+    """
+    _shared_watermark.update(shared_watermark)
+    for font_type, path in (font_paths or {}).items():
+        font_registry.add_path(font_type, path)
+
+def _process_file_in_worker(file_path, watermark_type, kwargs, shared_watermark=None, trace_memory=None, metrics=None):
+    """Memproses satu file di proses worker; error dikembalikan per file, tidak menghentikan batch.
+
+    trace_memory bukan None berarti metrics diminta dari proses worker: hasilnya (result, records) agar record
+    tahap bisa diteruskan ke JobMetrics di proses utama. metrics (JobMetrics) dipakai langsung jika file diproses
+    di proses utama; hasilnya tetap result saja.
+    """
+    if shared_watermark is None:
+        shared_watermark = _shared_watermark
+    worker_metrics = JobMetrics(trace_memory=trace_memory) if trace_memory is not None else None
+    try:
+        result = WatermarkHandler().process_files(file_path, watermark_type, metrics=worker_metrics or metrics, **kwargs, **shared_watermark)
+    except Exception as e:
+        result = [os.path.abspath(str(file_path)), f"Error While Embedding Watermark: {str(e)}"]
+    if worker_metrics is None:
+        return result
+    return result, worker_metrics.records
+
 class WatermarkHandler:
     def __init__(self):
         self.supported_image_types = ['jpg', 'jpeg', 'png', 'pdf']
@@ -13,23 +59,127 @@ class WatermarkHandler:
         return file_path.split('.')[-1].lower()  # Untuk input string
 
     def process_files(self, file_path, watermark_type, **kwargs):
-        """Memproses file gambar atau video berdasarkan input user."""
+        """Memproses file gambar atau video berdasarkan input user.
+
+        file_path berupa string menghasilkan [output_path, error_message]; berupa list/iterable
+        menghasilkan list hasil tersebut sesuai urutan input (lihat process_batch). kwargs['metrics']
+        (JobMetrics, opsional) mencatat tahap setiap file, ditutup tahap 'total' per file. Opsi di VIDEO_OPTIONS
+        hanya diteruskan ke file video dan output_format boleh berupa dict {'image': ..., 'video': ...}, sehingga
+        batch campuran gambar dan video bisa memakai opsi yang sama.
+        """
         if not file_path:
             raise ValueError("Tidak ada file yang dipilih untuk diproses.")
 
-        # Memeriksa jika file_path adalah list, dan jika ya, ambil file pertama
-        if isinstance(file_path, list):
-            file_path = file_path[0]
+        # Jika file_path berupa list/iterable, proses semua file sebagai batch
+        if not isinstance(file_path, str):
+            return self.process_batch(file_path, watermark_type, **kwargs)
 
-        # Cek apakah file pertama adalah gambar atau video
+        # Cek apakah file adalah gambar atau video
         file_ext = self.get_file_extension(file_path)
         
         if file_ext in self.supported_image_types:
-            return self.process_image_files(file_path, watermark_type, **kwargs)
+            media, process = 'image', self.process_image_files
+            kwargs = {key: value for key, value in kwargs.items() if key not in VIDEO_OPTIONS}
         elif file_ext in self.supported_video_types:
-            return self.process_video_files(file_path, watermark_type, **kwargs)
+            media, process = 'video', self.process_video_files
         else:
             raise ValueError(f"Tipe file '{file_ext}' tidak didukung.")
+        if isinstance(kwargs.get('output_format'), dict):
+            # Batch campuran: format output per jenis media, mis. {'image': 'png', 'video': 'mp4'}
+            kwargs['output_format'] = kwargs['output_format'].get(media)
+
+        metrics = kwargs.pop('metrics', None)
+        if metrics is not None:
+            metrics = metrics.for_job(os.path.abspath(file_path))
+            metrics.begin()
+            kwargs['metrics'] = metrics
+
+        processed = []  # Kosong jika hasil diambil dari cache
+
+        def run(options):
+            processed.append(True)
+            return process(file_path, watermark_type, **options)
+
+        # Cache hasil opsional: input dan opsi yang sama langsung mendapat hasil sebelumnya
+        result_cache = kwargs.pop('result_cache', None)
+        try:
+            result = result_cache.run(file_path, watermark_type, kwargs, run) if result_cache is not None else run(kwargs)
+        except Exception as e:
+            if metrics is not None:
+                metrics.end([file_path, str(e)])
+            raise
+
+        if metrics is not None:
+            output_path = result[0] if not result[1] and isinstance(result[0], str) and os.path.isfile(result[0]) else None
+            metrics.end(
+                result, cache_hit=not processed,
+                bytes_in=os.path.getsize(file_path) if os.path.isfile(file_path) else None,
+                bytes_out=os.path.getsize(output_path) if output_path is not None else None
+            )
+        return result
+
+    def prepare_shared_watermark(self, watermark_type, **kwargs):
+        """Menyiapkan bagian watermark yang sama untuk semua file (logo ter-decode, warna font) sekali saja."""
+        shared = {}
+        if watermark_type == 'logo' and kwargs.get('logo_path') is not None and kwargs.get('logo_image') is None:
+            logo_image, logo_key = load_logo_entry(kwargs['logo_path'])
+            if logo_image is None:
+                raise ValueError(f"Logo tidak dapat dibuka: {describe_logo_source(kwargs['logo_path'])}")
+            shared['logo_image'] = logo_image
+            shared['logo_key'] = logo_key  # Hash isi logo untuk cache sprite di setiap worker
+        elif watermark_type == 'text' and isinstance(kwargs.get('font_color'), str):
+            shared['font_color'] = get_color_from_string(kwargs['font_color'])
+        return shared
+
+    def process_batch(self, file_paths, watermark_type, workers=None, metrics=None, **kwargs):
+        """Memproses banyak file sekaligus di process pool.
+
+        Watermark bersama disiapkan sekali dan dikirim sekali ke tiap worker. Mengembalikan list
+        [output_path, error_message] sesuai urutan file input; error satu file tidak menghentikan file lain.
+        Record metrics dari proses worker diteruskan ke metrics (dan callback-nya) saat hasil file tersebut diterima.
+        progress_callback dan cancel_token (video) hanya didukung tanpa process pool: satu file atau workers=1.
+        """
+        file_paths = list(file_paths)
+        shared = self.prepare_shared_watermark(watermark_type, **kwargs)
+        kwargs = {key: value for key, value in kwargs.items() if key not in shared}
+        if 'logo_image' in shared:
+            # Logo sudah di-decode; sumber aslinya (bisa objek file yang tidak bisa di-pickle) tidak perlu dikirim
+            kwargs.pop('logo_path', None)
+
+        if workers == 1 or len(file_paths) == 1:
+            # Tidak perlu process pool untuk satu file / satu worker; metrics dipakai langsung
+            return [_process_file_in_worker(path, watermark_type, kwargs, shared, metrics=metrics) for path in file_paths]
+
+        if kwargs.get('progress_callback') is not None or kwargs.get('cancel_token') is not None:
+            raise ValueError("progress_callback dan cancel_token hanya didukung untuk satu file atau workers=1.")
+
+        font_paths = self.prepare_shared_fonts(watermark_type, kwargs.get('font_type'))
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(file_paths) // (workers * 4))
+        trace_memory = [metrics.trace_memory if metrics is not None else None] * len(file_paths)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(shared, font_paths)) as executor:
+            results = executor.map(_process_file_in_worker, file_paths, [watermark_type] * len(file_paths),
+                                   [kwargs] * len(file_paths), [None] * len(file_paths), trace_memory, chunksize=chunksize)
+            if metrics is None:
+                return list(results)
+
+            output = []
+            for result, records in results:
+                metrics.extend(records)
+                output.append(result)
+            return output
+
+    def prepare_shared_fonts(self, watermark_type, font_type):
+        """Path font TTF yang sudah di-resolve untuk worker batch ({} untuk logo atau font OpenCV).
+
+        Kegagalan diabaikan: font yang tidak ditemukan dilaporkan oleh pemrosesan file seperti biasa.
+        """
+        if watermark_type != 'text' or not isinstance(font_type, str) or font_type.lower() in get_cv2_fonts():
+            return {}
+        try:
+            return {font_type: font_registry.resolve(font_type)}
+        except ValueError:
+            return {}
 
     def process_image_files(self, file_path, watermark_type, **kwargs):
         """Memproses file gambar dengan menambahkan watermark."""
@@ -45,10 +195,30 @@ class WatermarkHandler:
         elif watermark_type == 'logo':
             return process_videos(video_path=video_path, watermark_type='logo', **kwargs)
 
-def run_watermark_handler(file_paths, watermark_type, enchance_quality=None, font_type=None, opacity=None, position_str=None, text=None, logo_path=None, font_color=None, output_format=None, thickness=None):
+def run_watermark_handler(file_paths, watermark_type, enchance_quality=None, font_type=None, opacity=None, position_str=None, text=None, logo_path=None, font_color=None, output_format=None, thickness=None, workers=None, pdf_mode='raster', pdf_workers=1, cache_dir=None, cache_max_bytes=1024 * 1024 * 1024, metrics=None, progress_callback=None, cancel_token=None, denoise_scale=None, pipeline_workers=None, segments=None, segment_workers=None, enhance_every=None):
     handler = WatermarkHandler()
+    batch_options = {} if isinstance(file_paths, str) else {'workers': workers}
+    if cache_dir is not None:
+        # Cache hasil di disk (dibagi oleh semua worker batch), dibatasi cache_max_bytes
+        batch_options['result_cache'] = ResultCache(cache_dir, cache_max_bytes)
+    if metrics is not None:
+        # Pengukuran per tahap (JobMetrics); hasil tetap [output_path, error_message]
+        batch_options['metrics'] = metrics
+    if denoise_scale is not None:
+        # Denoise profil 'balanced' pada luma yang diperkecil (gambar/PDF)
+        batch_options['denoise_scale'] = denoise_scale
+    # Opsi video (hanya diteruskan ke file video): pipeline thread per frame, segmen paralel, enhancement setiap frame ke-N
+    for name, value in (('pipeline_workers', pipeline_workers), ('segments', segments), ('segment_workers', segment_workers), ('enhance_every', enhance_every)):
+        if value is not None:
+            batch_options[name] = value
+    if progress_callback is not None:
+        # Progres job video (frame selesai, fps, ETA) dikirim ke callback
+        batch_options['progress_callback'] = progress_callback
+    if cancel_token is not None:
+        # Pembatalan kooperatif job video (job_control.CancelToken)
+        batch_options['cancel_token'] = cancel_token
     result = handler.process_files(
-        file_path=file_paths,  # Sekarang menerima string
+        file_path=file_paths,  # Menerima string (satu file) atau list/iterable (batch)
         watermark_type=watermark_type, 
         enchance_quality=enchance_quality,
         opacity=opacity,
@@ -58,6 +228,9 @@ def run_watermark_handler(file_paths, watermark_type, enchance_quality=None, fon
         font_color=font_color,
         position_str=position_str,
         output_format=output_format,
-        thickness=thickness
+        thickness=thickness,
+        pdf_mode=pdf_mode,  # 'raster' (render ulang halaman) atau 'vector' (overlay ke halaman asli)
+        pdf_workers=pdf_workers,  # Jumlah proses untuk render dan watermark halaman PDF (mode raster)
+        **batch_options
     )
     return result
\ No newline at end of file